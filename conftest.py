@@ -0,0 +1,42 @@
+import os
+import time
+import pytest
+
+
+# Pseudo-terminals standing in for boards. Each call of the returned function
+# opens one and returns (master, port): write to `master`, read from the
+# pyserial `port`. Every terminal opened is closed after the test.
+@pytest.fixture
+def open_pty():
+    if os.name != "posix":
+        pytest.skip("needs a pseudo-terminal")
+    import pty
+    import tty
+    import serial
+    opened = []
+
+    def open_one():
+        master, slave = pty.openpty()
+        tty.setraw(slave)  # Cooked mode would rewrite the bytes
+        port = serial.Serial(os.ttyname(slave), baudrate=9600, timeout=0.1)
+        os.close(slave)
+        opened.append((master, port))
+        return master, port
+
+    yield open_one
+    for master, port in opened:
+        port.close()
+        os.close(master)
+
+
+# Poll a condition until it holds; returns False if `timeout` seconds pass first
+@pytest.fixture
+def wait_for():
+    def wait(condition, timeout=3.0):
+        end = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > end:
+                return False
+            time.sleep(0.01)
+        return True
+    return wait
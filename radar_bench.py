@@ -0,0 +1,272 @@
+# Benchmarks for the radar frame loop, lock queries and serial parsing.
+#
+#   python radar_bench.py --output bench.json
+#   python radar_bench.py --baseline bench.json     # compare against an earlier run
+#   xvfb-run python radar_bench.py --tk             # include a real Tk canvas
+#
+# Every result is a timing in seconds (lower is better) or a throughput
+# (higher is better); --baseline flags results that got worse by more than
+# --threshold and exits non-zero if any did.
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+from radar_engine import RadarEngine, RADIUS
+from radar_ingest import AsciiParser
+from radar_protocol import FrameDecoder, encode_frame, MAX_SAMPLES
+from radar_ppi import PPIRaster
+
+DEFAULT_COUNTS = [6, 100, 1000, 10000, 100000]
+
+
+# Canvas that accepts every call and does nothing, to time the Python side
+# of rendering without Tk
+class NullCanvas:
+    def __init__(self):
+        self.items = 0
+
+    def _create(self, *args, **kwargs):
+        self.items += 1
+        return self.items
+
+    create_line = create_oval = create_polygon = create_rectangle = create_text = _create
+    create_image = _create
+
+    def _noop(self, *args, **kwargs):
+        pass
+
+    coords = itemconfigure = itemconfig = delete = tag_raise = _noop
+
+
+class NullRoot:
+    def title(self, *args):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def after(self, *args):
+        pass
+
+
+# Call fn repeatedly for at least min_time seconds (and at least `repeat`
+# times) and summarise the per-call wall times
+def measure(fn, repeat=5, min_time=0.2):
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - start < min_time:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if len(times) >= 10000:
+            break
+    times.sort()
+    return {
+        "mean": statistics.fmean(times),
+        "median": times[len(times) // 2],
+        "p95": times[min(int(len(times) * 0.95), len(times) - 1)],
+        "runs": len(times),
+    }
+
+
+def make_engine(count, seed=0):
+    engine = RadarEngine(count, seed=seed)
+    engine.step()
+    return engine
+
+
+def bench_simulation(counts):
+    results = {}
+    for count in counts:
+        engine = make_engine(count)
+        results[str(count)] = measure(engine.step)
+    return results
+
+
+def bench_render(counts, canvas_factory):
+    from radar_gui import RadarApp
+    results = {}
+    for count in counts:
+        canvas, root = canvas_factory()
+        engine = make_engine(count)
+        app = RadarApp(root, engine, canvas=canvas)
+        app.draw(engine.snapshot())  # First frame builds the canvas items
+
+        def frame():
+            engine.step()
+            app.draw(engine.snapshot())
+            if hasattr(root, "update_idletasks"):
+                root.update_idletasks()
+        results[str(count)] = measure(frame, repeat=3)
+        if hasattr(root, "destroy"):
+            root.destroy()
+    return results
+
+
+def null_canvas():
+    return NullCanvas(), NullRoot()
+
+
+def tk_canvas():
+    import tkinter as tk
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=700, height=600, bg="black")
+    canvas.pack()
+    root.update()
+    return canvas, root
+
+
+# One raster frame (decay, splat `count` echoes, encode the image) per call
+def bench_raster(counts):
+    results = {}
+    rng = np.random.default_rng(3)
+    for count in counts:
+        raster = PPIRaster(RADIUS)
+        angles = rng.uniform(0, 360, count)
+        distances = rng.uniform(0, RADIUS, count)
+
+        def frame():
+            raster.decay(0.033)
+            raster.add_returns(angles, distances)
+            raster.ppm()
+        results[str(count)] = measure(frame, repeat=3)
+    return results
+
+
+def bench_lock(counts, queries=2000):
+    results = {}
+    rng = np.random.default_rng(1)
+    for count in counts:
+        engine = make_engine(count)
+        points = rng.uniform(-RADIUS, RADIUS, (queries, 2)).tolist()
+
+        def lock():
+            for x, y in points:
+                engine.lock_nearest(x, y)
+        timing = measure(lock, repeat=3)
+        results[str(count)] = {key: (value / queries if key != "runs" else value)
+                               for key, value in timing.items()}
+    return results
+
+
+# Synthetic sensor streams of `samples` samples in each wire format
+def make_streams(samples):
+    rng = np.random.default_rng(2)
+    angles = np.round(rng.uniform(0, 180, samples), 2)
+    distances = np.round(rng.uniform(2, 400, samples), 1)
+    ascii_stream = "".join(f"{a},{d}\n" for a, d in zip(angles.tolist(), distances.tolist())).encode()
+    frames = []
+    for start in range(0, samples, MAX_SAMPLES):
+        stop = start + MAX_SAMPLES
+        frames.append(encode_frame(angles[start:stop], distances[start:stop],
+                                   np.arange(start, min(stop, samples)) * 1000,
+                                   np.arange(start, min(stop, samples))))
+    return {"ascii": ascii_stream, "binary": b"".join(frames)}
+
+
+# Feed each stream through its parser in serial-read-sized chunks
+def bench_parse(samples=200000, chunk=4096):
+    results = {}
+    parsers = {"ascii": AsciiParser, "binary": FrameDecoder}
+    for name, stream in make_streams(samples).items():
+        def parse():
+            parser = parsers[name]()
+            for start in range(0, len(stream), chunk):
+                parser.feed(stream[start:start + chunk])
+        timing = measure(parse, repeat=3)
+        results[name] = {
+            "seconds": timing["median"],
+            "bytes": len(stream),
+            "samples_per_s": samples / timing["median"],
+            "mb_per_s": len(stream) / timing["median"] / 1e6,
+        }
+    return results
+
+
+# Flatten nested results into {"a/b/c": value} for comparison
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+# Compare this run against a baseline. Only the headline metrics are
+# compared (median times, parse throughput); returns the regressions.
+def compare(results, baseline, threshold):
+    current = flatten(results)
+    previous = flatten(baseline)
+    regressions = []
+    for name, value in sorted(current.items()):
+        if name not in previous or not previous[name]:
+            continue
+        if name.endswith("/median"):
+            change = value / previous[name] - 1
+        elif name.endswith("_per_s"):
+            change = previous[name] / value - 1
+        else:
+            continue
+        marker = "  REGRESSION" if change > threshold else ""
+        print(f"{name:45s} {previous[name]:12.6g} -> {value:12.6g} ({change:+.1%}){marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the radar frame loop, lock queries and serial parsing")
+    parser.add_argument("--counts", default=",".join(map(str, DEFAULT_COUNTS)),
+                        help="comma separated target counts")
+    parser.add_argument("--tk", action="store_true", help="also render to a real Tk canvas (needs a display or Xvfb)")
+    parser.add_argument("--tk-max", type=int, default=10000, help="largest target count to render with Tk")
+    parser.add_argument("--parse-samples", type=int, default=200000, help="samples in the synthetic serial streams")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+    counts = [int(c) for c in args.counts.split(",")]
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "simulation": bench_simulation(counts),
+        "render_null": bench_render(counts, null_canvas),
+        "raster": bench_raster(counts),
+        "lock": bench_lock(counts),
+        "parse": bench_parse(args.parse_samples),
+    }
+    if args.tk:
+        results["render_tk"] = bench_render([c for c in counts if c <= args.tk_max], tk_canvas)
+
+    for section in ("simulation", "render_null", "render_tk", "raster", "lock"):
+        for count, timing in results.get(section, {}).items():
+            print(f"{section:12s} {count:>7s} targets: median {timing['median'] * 1e3:9.3f} ms  "
+                  f"p95 {timing['p95'] * 1e3:9.3f} ms")
+    for name, stats in results["parse"].items():
+        print(f"parse {name:6s}: {stats['samples_per_s']:12.0f} samples/s  {stats['mb_per_s']:7.2f} MB/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import numpy as np
+from radar_files import save_npz
+
+ANGLE_BINS = 360  # 1 degree bins over a full turn (fused multi-sensor angles go past 180)
+CELL_SIZE = 5.0  # Range cell size (cm)
+MAX_RANGE = 400.0  # Returns further out share the last cell
+ALPHA = 0.2  # EMA weight of each new look at an angle bin
+THRESHOLD = 0.5  # Background level at which a return counts as clutter
+
+
+# Polar clutter map. Each (angle bin, range cell) holds an exponential
+# moving average of how often a look along that bin returned an echo in
+# that cell. Every batch of samples is one vectorized update: the cells of
+# each angle bin that was looked at decay once per look, and the cells that
+# returned an echo move towards 1. Walls and fixed objects answer from the
+# same cell on every sweep and climb past THRESHOLD within a few sweeps;
+# moving targets only touch a cell once or twice and stay under it.
+#
+# filter() tests samples against the map as it was before the batch (with a
+# cell of slack either side for range noise), then learns from the batch.
+class ClutterMap:
+    def __init__(self, angle_bins=ANGLE_BINS, cell_size=CELL_SIZE, max_range=MAX_RANGE,
+                 alpha=ALPHA, threshold=THRESHOLD):
+        self.angle_bins = angle_bins
+        self.cell_size = cell_size
+        self.range_cells = int(np.ceil(max_range / cell_size))
+        self.alpha = alpha
+        self.threshold = threshold
+        self.map = np.zeros((angle_bins, self.range_cells), dtype=np.float32)
+        self.samples = 0
+        self.suppressed = 0
+
+    @property
+    def suppression_ratio(self):
+        return self.suppressed / self.samples if self.samples else 0.0
+
+    def _cells(self, angles, distances):
+        bins = np.floor(np.asarray(angles) * (self.angle_bins / 360.0)).astype(np.intp) % self.angle_bins
+        cells = np.clip((np.asarray(distances) / self.cell_size).astype(np.intp), 0, self.range_cells - 1)
+        return bins, cells
+
+    # Background level at each sample, the highest of its cell and the
+    # cells either side
+    def level(self, angles, distances):
+        bins, cells = self._cells(angles, distances)
+        return self._level(bins, cells)
+
+    def _level(self, bins, cells):
+        last = self.range_cells - 1
+        m = self.map
+        return np.maximum(m[bins, cells],
+                          np.maximum(m[bins, np.maximum(cells - 1, 0)], m[bins, np.minimum(cells + 1, last)]))
+
+    # Learn from a batch of samples
+    def update(self, angles, distances):
+        bins, cells = self._cells(angles, distances)
+        self._update(bins, cells)
+
+    def _update(self, bins, cells):
+        looks = np.bincount(bins, minlength=self.angle_bins)
+        seen = np.flatnonzero(looks)
+        self.map[seen] *= ((1 - self.alpha) ** looks[seen]).astype(np.float32)[:, None]
+        hits = np.bincount(bins * self.range_cells + cells, minlength=self.map.size)
+        self.map += (self.alpha * hits).astype(np.float32).reshape(self.map.shape)
+        np.minimum(self.map, 1.0, out=self.map)
+
+    # Boolean mask of the samples that are NOT clutter. The map learns from
+    # every sample, kept or not.
+    def filter(self, angles, distances):
+        if not len(angles):
+            return np.zeros(0, dtype=bool)
+        bins, cells = self._cells(angles, distances)
+        keep = self._level(bins, cells) < self.threshold
+        self._update(bins, cells)
+        self.samples += len(keep)
+        self.suppressed += int(len(keep) - keep.sum())
+        return keep
+
+    def save(self, path):
+        save_npz(path, map=self.map, cell_size=self.cell_size, alpha=self.alpha, threshold=self.threshold)
+
+    # Replace the map with one saved earlier. Returns False (and keeps the
+    # current map) if the file is missing or has a different layout.
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            saved = data["map"]
+            if saved.shape != self.map.shape or float(data["cell_size"]) != self.cell_size:
+                print(f"Ignoring clutter map {path}: it has a different layout")
+                return False
+            self.map[:] = saved
+        return True
+
+
+def add_clutter_arguments(parser):
+    parser.add_argument("--clutter", action="store_true",
+                        help="suppress static returns with a learned clutter map")
+    parser.add_argument("--clutter-map", metavar="FILE",
+                        help="load the clutter map from FILE at start (if it exists) and save it on exit")
+
+
+# The ClutterMap chosen by the add_clutter_arguments() options, or None
+def make_clutter(args):
+    if not (args.clutter or args.clutter_map):
+        return None
+    clutter = ClutterMap()
+    if args.clutter_map and clutter.load(args.clutter_map):
+        print(f"Loaded clutter map from {args.clutter_map}")
+    return clutter
+
+
+def save_clutter(clutter, args):
+    if clutter is not None and args.clutter_map:
+        clutter.save(args.clutter_map)
+        print(f"Saved clutter map to {args.clutter_map} ({clutter.suppression_ratio:.0%} suppressed)")
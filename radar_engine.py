@@ -0,0 +1,290 @@
+import argparse
+import random
+import time
+import numpy as np
+from radar_tracks import TrackStore, TARGET_TYPES, TYPE_CODES
+from radar_spatial import GridIndex
+from radar_tracker import Tracker
+
+RADIUS = 250  # Radar range in display units (cm)
+TICK = 0.05  # Seconds of simulated time per step
+INITIAL_TARGET_COUNT = 6
+DISAPPEAR_RATE = 0.0067  # Chance per second that a visible target drops out
+REAPPEAR_TIMEOUT = 5  # Seconds before a dropped target comes back
+LOCK_RADIUS = 50  # How close the box has to be to a target to lock it
+LOCK_LOST_TIMEOUT = 3  # Seconds a locked target may be missing before the lock drops
+SENSOR_ID_BASE = 1 << 32  # Offset that keeps sensor track IDs apart from simulated ones
+
+# List of realistic target names for different types of aircraft, ships, and vehicles
+aircraft_names = ["Eagle-1", "Raptor-2", "Falcon-3", "Hawk-4", "Viper-5", "Hornet-6", "Condor-7", "Phoenix-8"]
+ship_names = ["Nimbus", "Poseidon", "Triton", "Kraken", "Tempest", "Nautilus", "Aegis", "Trident"]
+vehicle_names = ["Rover-1", "Chariot-2", "Nomad-3", "Voyager-4", "Pathfinder", "Sentinel", "Guardian", "Vanguard"]
+unknown_names = ["Unknown-A", "Unknown-B", "Unknown-C", "Unknown-D", "Unknown-E", "Unknown-F", "Unknown-G", "Unknown-H"]
+
+# Target type constants
+TARGET_AIRCRAFT = "aircraft"
+TARGET_SHIP = "ship"
+TARGET_VEHICLE = "vehicle"
+TARGET_UNKNOWN = "unknown"
+
+# How each simulated type is spawned: names, range band (fraction of the
+# radius) and the +/- limits of its angle and distance velocities, in
+# degrees and cm per second
+TARGET_PROFILES = [
+    # Aircraft are far targets; slower velocity (reduced by 50%)
+    (TARGET_AIRCRAFT, aircraft_names, (0.7, 0.9), (3.3, 6.7)),
+    # Ships are at medium distance; slower velocity (reduced by 70%)
+    (TARGET_SHIP, ship_names, (0.4, 0.6), (2.0, 4.0)),
+    # Vehicles are close targets; slower velocity (reduced by 80%)
+    (TARGET_VEHICLE, vehicle_names, (0.1, 0.3), (1.3, 2.7)),
+]
+
+
+# Frozen copy of the engine state for a consumer (the GUI) to draw from.
+# Has the same array attributes as a TrackStore so renderers take either.
+class Snapshot:
+    __slots__ = ("time", "angle", "distance", "visible", "type_code", "track_id", "names",
+                 "base_count", "locked_index", "lock_time", "lock_lost_time")
+
+    def __init__(self, engine):
+        tracks = engine.tracks
+        self.time = engine.time
+        self.angle = tracks.angle.copy()
+        self.distance = tracks.distance.copy()
+        self.visible = tracks.visible.copy()
+        self.type_code = tracks.type_code.copy()
+        self.track_id = tracks.track_id.copy()
+        self.names = list(tracks.names)
+        self.base_count = engine.base_count
+        self.locked_index = engine.locked_index
+        self.lock_time = engine.lock_time
+        self.lock_lost_time = engine.lock_lost_time
+
+    def __len__(self):
+        return len(self.angle)
+
+    def type_name(self, i):
+        return TARGET_TYPES[self.type_code[i]]
+
+
+# Tk-free radar simulation: target motion, the disappear/reappear model and
+# the lock state machine. Time only moves when step() is called, by a fixed
+# `dt` per step, so runs are repeatable for a given seed and can go as fast
+# as the CPU allows. Positions used for locking are relative to the radar
+# centre in display units.
+#
+# Raw sensor detections go through a Tracker; its confirmed tracks are kept
+# in the track store after the simulated targets (from index base_count on).
+# Their visibility and lifetime come from the tracker's update and deletion
+# rules rather than the simulated disappear/lock-lost timers. With a
+# ClutterMap, detections it recognises as static background are dropped
+# before they reach the tracker.
+class RadarEngine:
+    def __init__(self, initial_target_count=INITIAL_TARGET_COUNT, seed=None,
+                 dt=TICK, radius=RADIUS, verbose=False, clutter=None):
+        self.initial_target_count = initial_target_count
+        self.dt = dt
+        self.radius = radius
+        self.verbose = verbose
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+        self.tracks = TrackStore(max(initial_target_count, 1))
+        self.index = GridIndex(-radius, -radius, 2 * radius, 2 * radius)
+        self.tracker = Tracker()
+        self.clutter = clutter
+        # Tuning constants, per engine so scenario sweeps can vary them
+        self.disappear_rate = DISAPPEAR_RATE
+        self.reappear_timeout = REAPPEAR_TIMEOUT
+        self.lock_radius = LOCK_RADIUS
+        self.lock_lost_timeout = LOCK_LOST_TIMEOUT
+        self.time = 0.0
+        self.ticks = 0
+        self.initial_targets_created = False
+        self.base_count = 0  # Tracks before the sensor returns in the store
+        self.locked_index = None  # Index of the locked target
+        self.lock_time = None
+        self.lock_lost_time = None  # When the locked target went missing
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    # Create the simulated targets, spread evenly over the target types
+    def create_initial_targets(self):
+        count = self.initial_target_count
+        for k, (type_name, names, band, speed) in enumerate(TARGET_PROFILES):
+            n = count // len(TARGET_PROFILES) + (k < count % len(TARGET_PROFILES))
+            if n == 0:
+                continue
+            rng = self.rng
+            self.tracks.add_many(rng.uniform(0, 180, n),
+                                 rng.uniform(self.radius * band[0], self.radius * band[1], n),
+                                 rng.uniform(-speed[0], speed[0], n),
+                                 rng.uniform(-speed[1], speed[1], n),
+                                 TYPE_CODES[type_name], self.random.choices(names, k=n))
+        self.initial_targets_created = True
+        self.base_count = len(self.tracks)
+        self.log(f"Created {len(self.tracks)} initial targets")
+
+    # Feed a batch of raw sensor detections (angles in degrees, distances,
+    # sample times in seconds) through the tracker
+    def add_detections(self, angles, distances, times):
+        if not self.initial_targets_created:
+            self.create_initial_targets()
+        angles = np.asarray(angles, dtype=float)
+        distances = np.asarray(distances, dtype=float)
+        times = np.asarray(times, dtype=float)
+        if self.clutter is not None:
+            keep = self.clutter.filter(angles, distances)
+            angles = angles[keep]
+            distances = distances[keep]
+            times = times[keep]
+        self.tracker.process(angles, distances, times)
+        self._sync_sensor_tracks()
+
+    # Mirror the tracker's confirmed tracks into the store after the
+    # simulated targets, keeping a lock on a sensor track by its ID
+    def _sync_sensor_tracks(self):
+        tracks = self.tracks
+        first = self.base_count
+        locked_id = None
+        if self.locked_index is not None and self.locked_index >= first:
+            locked_id = int(tracks.track_id[self.locked_index])
+        tracks.truncate(first)
+        ids, angles, distances, visible = self.tracker.tracks()
+        ids = ids + SENSOR_ID_BASE
+        tracks.add_many(angles, np.minimum(distances, self.radius), 0, 0, TYPE_CODES[TARGET_UNKNOWN],
+                        [f"Track-{i - SENSOR_ID_BASE}" for i in ids.tolist()], ids=ids)
+        tracks.visible[first:] = visible
+        if locked_id is not None:
+            found = np.flatnonzero(ids == locked_id)
+            if len(found):
+                # The tracker decides when a sensor track is gone, so there
+                # is no lost-lock timer for it
+                self.locked_index = first + int(found[0])
+                self.lock_lost_time = None
+            else:
+                self.log("Lock lost - track dropped by the tracker")
+                self.clear_lock()
+        self._rebuild_index()
+
+    # Replace every track with recorded or received states (used by replay
+    # and feed clients). `now` is the time the states are from and becomes
+    # the engine's clock.
+    def load_tracks(self, angles, distances, visible, type_codes, names, locked_index, now, ids=None):
+        tracks = self.tracks
+        tracks.clear()
+        tracks.add_many(angles, distances, 0, 0, 0, names, ids=ids)
+        tracks.type_code[:] = type_codes
+        tracks.visible[:] = visible
+        self.base_count = len(tracks)
+        self.initial_targets_created = True
+        self.time = now
+        if locked_index != self.locked_index:
+            self.locked_index = locked_index
+            self.lock_time = now if locked_index is not None else None
+        self.lock_lost_time = None
+        # The tracker's tracks aren't in the loaded states; put them back
+        self._sync_sensor_tracks()
+
+    # Age the sensor tracks to `now` without stepping the simulation (used
+    # by replay, which brings its own clock), deleting the stale ones
+    def coast_tracks(self, now):
+        tracker = self.tracker
+        if tracker.time is None:
+            return
+        tracker.coast(now)
+        self._sync_sensor_tracks()
+
+    # Advance the simulation by one fixed step
+    def step(self):
+        if not self.initial_targets_created:
+            self.create_initial_targets()
+        tracks = self.tracks
+        self.ticks += 1
+        self.time += self.dt
+        now = self.time
+
+        # Update all target positions from their velocities, bouncing off the edge
+        tracks.step(self.radius, self.dt)
+
+        # Randomly hide visible targets, and bring back ones that have been gone long enough
+        disappeared = tracks.random_disappear(now, self.disappear_rate * self.dt, self.rng)
+        reappeared = tracks.reappear(now, self.reappear_timeout)
+        self._update_lock(now, disappeared, reappeared)
+
+        # Age the sensor tracks by the same step
+        tracker = self.tracker
+        if tracker.time is not None:
+            tracker.coast(tracker.time + self.dt)
+            self._sync_sensor_tracks()
+        else:
+            self._rebuild_index()
+
+    # Run `n` steps back to back
+    def run(self, n):
+        for _ in range(n):
+            self.step()
+
+    def _update_lock(self, now, disappeared, reappeared):
+        i = self.locked_index
+        if i is None:
+            return
+        # If the locked target disappeared, start counting lost time
+        if disappeared[i] and self.lock_lost_time is None:
+            self.lock_lost_time = now
+        # If the locked target reappeared, reset lost time
+        if reappeared[i]:
+            self.lock_lost_time = None
+        # Drop the lock if it has been lost for too long
+        if self.lock_lost_time is not None and now - self.lock_lost_time > self.lock_lost_timeout:
+            self.log("Lock lost - target out of radar range for too long")
+            self.clear_lock()
+
+    def _rebuild_index(self):
+        xs, ys = self.tracks.positions(0, 0)
+        self.index.build(xs, ys)
+
+    # Lock onto the target closest to (x, y) if one is within max_distance
+    # (the engine's lock_radius by default). Returns the locked index, or
+    # None (which also clears any old lock).
+    def lock_nearest(self, x, y, max_distance=None):
+        if max_distance is None:
+            max_distance = self.lock_radius
+        i, _ = self.index.nearest(x, y, max_distance)
+        if i is None or i >= len(self.tracks):
+            self.clear_lock()
+            return None
+        self.locked_index = i
+        self.lock_time = self.time
+        self.lock_lost_time = None
+        return i
+
+    def clear_lock(self):
+        self.locked_index = None
+        self.lock_time = None
+        self.lock_lost_time = None
+
+    def snapshot(self):
+        return Snapshot(self)
+
+
+# Run the engine headless, e.g. for soak tests on machines with no display
+def main():
+    parser = argparse.ArgumentParser(description="Run the radar simulation without a display")
+    parser.add_argument("--ticks", type=int, default=10000, help="number of steps to run")
+    parser.add_argument("--targets", type=int, default=INITIAL_TARGET_COUNT, help="number of simulated targets")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    engine = RadarEngine(args.targets, seed=args.seed)
+    start = time.perf_counter()
+    engine.run(args.ticks)
+    elapsed = time.perf_counter() - start
+    visible = int(engine.tracks.visible.sum())
+    print(f"{args.ticks} ticks of {len(engine.tracks)} targets in {elapsed:.3f}s "
+          f"({args.ticks / elapsed:.0f} ticks/s, {engine.time:.1f}s simulated, {visible} visible)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+# File helpers shared by modules that save their state to disk. This module
+# imports nothing else from the radar package, so any of them can use it.
+import numpy as np
+
+
+# Save named arrays to a compressed .npz at exactly `path`. Writing through
+# a file object stops NumPy from appending .npz to the name.
+def save_npz(path, **arrays):
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **arrays)
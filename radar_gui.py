@@ -1,439 +1,488 @@
 import tkinter as tk
+import argparse
 import math
-import random
 import time
-import serial
-import serial.tools.list_ports
-
-# Radar GUI setup
-root = tk.Tk()
-root.title("Radar System with Box Control")
-# Increase canvas size to accommodate more information
-canvas = tk.Canvas(root, width=700, height=600, bg="black")
-canvas.pack()
-
-# Try to find available serial ports
-available_ports = list(serial.tools.list_ports.comports())
-ser = None
-
-# Try to connect to the first available port
-if available_ports:
-    try:
-        ser = serial.Serial(available_ports[0].device, baudrate=9600, timeout=1)
-        print(f"Connected to {available_ports[0].device}")
-    except Exception as e:
-        print(f"Could not connect to {available_ports[0].device}: {e}")
-        ser = None
-else:
-    print("No serial ports found")
-
-# Draw radar background (static, no need to redraw every time)
+import numpy as np
+from radar_renderer import TargetRenderer, TrailRenderer, TextPanel, PooledLine
+from radar_history import TrackHistory
+from radar_ppi import PPIRaster
+from radar_sensors import SensorHub, add_sensor_arguments, open_hub
+from radar_engine import (RadarEngine, RADIUS,
+                          TARGET_AIRCRAFT, TARGET_SHIP, TARGET_VEHICLE)
+from radar_scheduler import FrameScheduler, RENDER_FPS
+from radar_metrics import Metrics, MetricsWriter, instrument_canvas
+from radar_replay import LogRecorder, LogReader, Replayer, apply_records
+from radar_server import FeedClient, apply_feed
+from radar_clutter import add_clutter_arguments, make_clutter, save_clutter
+
 CENTER_X, CENTER_Y = 300, 300  # Center point moved to accommodate larger screen
-RADIUS = 250  # Increased radar radius
-canvas.create_oval(CENTER_X - RADIUS, CENTER_Y - RADIUS, 
-                   CENTER_X + RADIUS, CENTER_Y + RADIUS, outline="green", tags="background")
-
-# Keep track of the dynamic targets
-targets = []
-target_velocities = []  # Store velocity vectors for each target
-target_visibilities = []  # Track if targets are visible or not
-target_disappear_times = []  # Track when each target disappeared
-target_names = []  # Store names for each target
-target_types = []  # Store the type of each target (aircraft, ship, vehicle, unknown)
-locked_target_index = None  # Store the index of the locked target
-lock_time = None
-lock_lost_time = None  # Track when a lock was lost
-
-# Flag to indicate if initial targets have been created
-initial_targets_created = False
-# Number of initial targets to create
-INITIAL_TARGET_COUNT = 6
-
-# List of realistic target names for different types of aircraft, ships, and vehicles
-aircraft_names = ["Eagle-1", "Raptor-2", "Falcon-3", "Hawk-4", "Viper-5", "Hornet-6", "Condor-7", "Phoenix-8"]
-ship_names = ["Nimbus", "Poseidon", "Triton", "Kraken", "Tempest", "Nautilus", "Aegis", "Trident"]
-vehicle_names = ["Rover-1", "Chariot-2", "Nomad-3", "Voyager-4", "Pathfinder", "Sentinel", "Guardian", "Vanguard"]
-unknown_names = ["Unknown-A", "Unknown-B", "Unknown-C", "Unknown-D", "Unknown-E", "Unknown-F", "Unknown-G", "Unknown-H"]
-
-# Target type constants
-TARGET_AIRCRAFT = "aircraft"
-TARGET_SHIP = "ship"
-TARGET_VEHICLE = "vehicle"
-TARGET_UNKNOWN = "unknown"
-
-# Create a movable box
-box_size = 20
-box_x, box_y = CENTER_X, CENTER_Y
-# Create only the left and right sides of the box with white lines
-left_line = canvas.create_line(box_x - box_size // 2, box_y - box_size // 2, 
-                              box_x - box_size // 2, box_y + box_size // 2, 
-                              fill="white", tags="box")
-right_line = canvas.create_line(box_x + box_size // 2, box_y - box_size // 2, 
-                               box_x + box_size // 2, box_y + box_size // 2, 
-                               fill="white", tags="box")
-
-# Function to move the box
-def move_box(dx, dy):
-    global box_x, box_y
-    # Update box position
-    box_x += dx
-    box_y += dy
-    # Keep the box within the radar circle
-    distance_from_center = math.sqrt((box_x - CENTER_X)**2 + (box_y - CENTER_Y)**2)
-    if distance_from_center > RADIUS - box_size // 2:
-        # If box is outside the radar, adjust position
-        angle = math.atan2(box_y - CENTER_Y, box_x - CENTER_X)
-        box_x = CENTER_X + (RADIUS - box_size // 2) * math.cos(angle)
-        box_y = CENTER_Y + (RADIUS - box_size // 2) * math.sin(angle)
-    # Redraw the box at the new position (only left and right sides)
-    canvas.coords(left_line, box_x - box_size // 2, box_y - box_size // 2, 
-                 box_x - box_size // 2, box_y + box_size // 2)
-    canvas.coords(right_line, box_x + box_size // 2, box_y - box_size // 2, 
-                 box_x + box_size // 2, box_y + box_size // 2)
-
-# Bind keyboard events to move the box
-def handle_key(event):
-    global locked_target_index, lock_time
-    key = event.keysym.lower()
-    if key == 'w':
-        move_box(0, -10)  # Move up
-    elif key == 's':
-        move_box(0, 10)   # Move down
-    elif key == 'a':
-        move_box(-10, 0)  # Move left
-    elif key == 'd':
-        move_box(10, 0)   # Move right
-    elif key == 'space':
-        # Find the closest target to the box
-        if targets:
-            closest_target_idx = None
-            min_distance = float('inf')
-            for i, target in enumerate(targets):
-                angle, distance = target
-                rad_angle = math.radians(angle)
-                target_x = CENTER_X + distance * math.cos(rad_angle)
-                target_y = CENTER_Y + distance * math.sin(rad_angle)
-                
-                # Calculate distance between box and target
-                box_to_target = math.sqrt((box_x - target_x)**2 + (box_y - target_y)**2)
-                
-                if box_to_target < min_distance:
-                    min_distance = box_to_target
-                    closest_target_idx = i
-            
-            # Lock onto the closest target if it's within range (50 pixels)
-            if min_distance < 50:
-                locked_target_index = closest_target_idx
-                lock_time = time.time()
-                target_name = target_names[locked_target_index] if locked_target_index < len(target_names) else "Unknown"
-                print(f"Locked onto {target_name} at angle: {targets[locked_target_index][0]:.2f}°, distance: {targets[locked_target_index][1]:.2f} cm")
+
+
+# Radar display. Tracks come from the RadarEngine, fed by a SensorHub of
+# boards, a replayed log or a radar_server feed; the GUI draws the engine's
+# snapshots, trails from a TrackHistory and an optional raster PPI, and
+# keeps the lock. A FrameScheduler decides when to step the engine and when
+# to draw, and each frame phase is timed into a Metrics.
+class RadarApp:
+    def __init__(self, root, engine, sensors=None, canvas=None, recorder=None, replayer=None,
+                 fps=RENDER_FPS, overlay=False, metrics_writer=None, feed=None, raster=False):
+        self.root = root
+        self.engine = engine
+        self.sensors = sensors if sensors is not None else SensorHub([])
+        self.recorder = recorder
+        self.replayer = replayer
+        self.feed = feed
+        self.scheduler = FrameScheduler(engine.dt, fps)
+        # Replays and feeds bring their own track states; the engine isn't stepped
+        self.scheduler.stepping = replayer is None and feed is None
+        self.last_frame_time = self.scheduler.clock()
+        self.metrics = Metrics()
+        for name in ("items_created", "items_deleted", "serial_bytes", "parse_errors",
+                     "ring_overruns", "samples_dropped", "frames_dropped"):
+            self.metrics.set_total(name, 0)
+        self.metrics_writer = metrics_writer
+        self.show_overlay = overlay
+        root.title("Radar System with Box Control")
+        if canvas is None:
+            # Increase canvas size to accommodate more information
+            canvas = tk.Canvas(root, width=700, height=600, bg="black")
+            canvas.pack()
+        self.canvas = instrument_canvas(canvas, self.metrics)
+
+        # Read each sensor on a background thread so the Tk loop never blocks on it;
+        # samples are queued in ring buffers and drained once per wake-up
+        self.sensors.start()
+
+        # Draw radar background (static, no need to redraw every time)
+        canvas.create_oval(CENTER_X - RADIUS, CENTER_Y - RADIUS,
+                           CENTER_X + RADIUS, CENTER_Y + RADIUS, outline="green", tags="background")
+
+        # Create a movable box
+        self.box_size = 20
+        self.box_x, self.box_y = CENTER_X, CENTER_Y
+        box_x, box_y, box_size = self.box_x, self.box_y, self.box_size
+        # Create only the left and right sides of the box with white lines
+        self.left_line = canvas.create_line(box_x - box_size // 2, box_y - box_size // 2,
+                                            box_x - box_size // 2, box_y + box_size // 2,
+                                            fill="white", tags="box")
+        self.right_line = canvas.create_line(box_x + box_size // 2, box_y - box_size // 2,
+                                             box_x + box_size // 2, box_y + box_size // 2,
+                                             fill="white", tags="box")
+
+        # Canvas items are kept between frames and only moved or re-configured
+        self.target_renderer = TargetRenderer(canvas, tag="target")
+        self.history = TrackHistory()
+        self.trail_renderer = TrailRenderer(canvas, tag="trail", center=(CENTER_X, CENTER_Y))
+        self.raster = None
+        self.raster_image = None
+        self.raster_item = None
+        self.raster_time = None
+        self.sweep_line = PooledLine(canvas, "raster", fill="green")
+        if raster:
+            self.set_raster(True)
+        self.info_panel = TextPanel(canvas, tag="info")
+        self.lock_panel = TextPanel(canvas, tag="lock_info")
+        self.lock_line = PooledLine(canvas, "lock_info", fill="yellow", dash=(3, 2))
+        self.overlay_panel = TextPanel(canvas, tag="overlay")
+
+        # Bind the key press event
+        root.bind("<Key>", self.handle_key)
+
+    # Function to move the box
+    def move_box(self, dx, dy):
+        box_size = self.box_size
+        # Update box position
+        self.box_x += dx
+        self.box_y += dy
+        # Keep the box within the radar circle
+        distance_from_center = math.sqrt((self.box_x - CENTER_X)**2 + (self.box_y - CENTER_Y)**2)
+        if distance_from_center > RADIUS - box_size // 2:
+            # If box is outside the radar, adjust position
+            angle = math.atan2(self.box_y - CENTER_Y, self.box_x - CENTER_X)
+            self.box_x = CENTER_X + (RADIUS - box_size // 2) * math.cos(angle)
+            self.box_y = CENTER_Y + (RADIUS - box_size // 2) * math.sin(angle)
+        box_x, box_y = self.box_x, self.box_y
+        # Redraw the box at the new position (only left and right sides)
+        self.canvas.coords(self.left_line, box_x - box_size // 2, box_y - box_size // 2,
+                           box_x - box_size // 2, box_y + box_size // 2)
+        self.canvas.coords(self.right_line, box_x + box_size // 2, box_y - box_size // 2,
+                           box_x + box_size // 2, box_y + box_size // 2)
+
+    # Bind keyboard events to move the box
+    def handle_key(self, event):
+        key = event.keysym.lower()
+        if key == 'w':
+            self.move_box(0, -10)  # Move up
+        elif key == 's':
+            self.move_box(0, 10)   # Move down
+        elif key == 'a':
+            self.move_box(-10, 0)  # Move left
+        elif key == 'd':
+            self.move_box(10, 0)   # Move right
+        elif key == 'r':
+            # Switch between vector targets and the raster display
+            self.set_raster(self.raster is None)
+        elif key == 'm':
+            # Toggle the performance overlay
+            self.show_overlay = not self.show_overlay
+            if not self.show_overlay:
+                self.overlay_panel.begin()
+                self.overlay_panel.end()
+        elif key == 'space':
+            engine = self.engine
+            tracks = engine.tracks
+            # Find the closest target to the box
+            if len(tracks):
+                # Lock onto the closest target if it's within range (50 pixels)
+                i = engine.lock_nearest(self.box_x - CENTER_X, self.box_y - CENTER_Y)
+                if i is not None:
+                    print(f"Locked onto {tracks.names[i]} at angle: {tracks.angle[i]:.2f}°, distance: {tracks.distance[i]:.2f} cm")
+                else:
+                    print("No target within range")
             else:
-                locked_target_index = None
-                print("No target within range")
+                print("No targets available")
+
+    # Function to update the radar display
+    def update_radar(self):
+        engine = self.engine
+        recorder = self.recorder
+        scheduler = self.scheduler
+        now = scheduler.clock()
+        elapsed = now - self.last_frame_time
+        self.last_frame_time = now
+
+        metrics = self.metrics
+
+        if self.feed is not None:
+            # Take the newest picture from the server, if it sent one
+            with metrics.phase("serial"):
+                state = self.feed.take()
+                if state is not None:
+                    apply_feed(engine, state)
+        elif self.replayer is not None:
+            # Play back whatever the log has for the time since the last wake-up
+            with metrics.phase("serial"):
+                apply_records(engine, self.replayer.advance(elapsed), self.replayer.time)
         else:
-            print("No targets available")
-
-# Bind the key press event
-root.bind("<Key>", handle_key)
-
-# Function to create initial targets
-def create_initial_targets():
-    global targets, target_velocities, target_visibilities, target_names, target_types, initial_targets_created
-    
-    # Create 2 aircraft (far targets)
-    for _ in range(2):
-        angle = random.uniform(0, 180)
-        distance = random.uniform(RADIUS * 0.7, RADIUS * 0.9)  # Far distance
-        targets.append((angle, distance))
-        # Slower velocity for aircraft (reduced by 50%)
-        target_velocities.append((random.uniform(-0.5, 0.5), random.uniform(-1, 1)))
-        target_visibilities.append(True)
-        target_disappear_times.append(None)  # No disappear time initially
-        target_names.append(random.choice(aircraft_names))
-        target_types.append(TARGET_AIRCRAFT)
-    
-    # Create 2 ships (medium distance)
-    for _ in range(2):
-        angle = random.uniform(0, 180)
-        distance = random.uniform(RADIUS * 0.4, RADIUS * 0.6)  # Medium distance
-        targets.append((angle, distance))
-        # Slower velocity for ships (reduced by 70%)
-        target_velocities.append((random.uniform(-0.3, 0.3), random.uniform(-0.6, 0.6)))
-        target_visibilities.append(True)
-        target_disappear_times.append(None)  # No disappear time initially
-        target_names.append(random.choice(ship_names))
-        target_types.append(TARGET_SHIP)
-    
-    # Create 2 vehicles (close targets)
-    for _ in range(2):
-        angle = random.uniform(0, 180)
-        distance = random.uniform(RADIUS * 0.1, RADIUS * 0.3)  # Close distance
-        targets.append((angle, distance))
-        # Slower velocity for vehicles (reduced by 80%)
-        target_velocities.append((random.uniform(-0.2, 0.2), random.uniform(-0.4, 0.4)))
-        target_visibilities.append(True)
-        target_disappear_times.append(None)  # No disappear time initially
-        target_names.append(random.choice(vehicle_names))
-        target_types.append(TARGET_VEHICLE)
-    
-    initial_targets_created = True
-    print(f"Created {len(targets)} initial targets")
-
-# Function to update the radar display
-def update_radar():
-    global targets, target_velocities, target_visibilities, locked_target_index, lock_lost_time, initial_targets_created
-    
-    canvas.delete("target")  # Clear previous targets only
-    canvas.delete("info")    # Clear info text
-    canvas.delete("lock_info")  # Clear lock information
-
-    # Create initial targets if they haven't been created yet
-    if not initial_targets_created:
-        create_initial_targets()
-    
-    # Update existing target positions based on their velocities
-    for i in range(len(targets)):
-        # Ensure all arrays are properly initialized and have the same length
-        while len(target_velocities) <= i:
-            target_velocities.append((random.uniform(-0.3, 0.3), random.uniform(-0.6, 0.6)))
-            
-        angle, distance = targets[i]
-        v_angle, v_distance = target_velocities[i]
-        
-        # Update angle and distance based on velocity
-        new_angle = (angle + v_angle) % 180
-        new_distance = distance + v_distance
-        
-        # Bounce off boundaries
-        if new_distance <= 0 or new_distance >= RADIUS:
-            target_velocities[i] = (v_angle, -v_distance)
-            new_distance = max(0, min(new_distance, RADIUS))
-        
-        # Update target position
-        targets[i] = (new_angle, new_distance)
-        
-        # Randomly toggle visibility (0.1% chance per update - 10x less frequent)
-        if random.random() < 0.001 and i < len(target_visibilities):
-            # If target is currently visible, make it disappear
-            if target_visibilities[i]:
-                target_visibilities[i] = False
-                if i < len(target_disappear_times):
-                    target_disappear_times[i] = time.time()  # Record when it disappeared
-                else:
-                    # Ensure array is properly sized
-                    while len(target_disappear_times) <= i:
-                        target_disappear_times.append(None)
-                    target_disappear_times[i] = time.time()
-                
-                # If this is the locked target and it disappeared, start counting lost time
-                if i == locked_target_index and lock_lost_time is None:
-                    lock_lost_time = time.time()
-        
-        # Check if a disappeared target should reappear (after 5 seconds)
-        if i < len(target_visibilities) and i < len(target_disappear_times) and not target_visibilities[i] and target_disappear_times[i] is not None:
-            if time.time() - target_disappear_times[i] > 5:  # 5 seconds timeout
-                target_visibilities[i] = True
-                target_disappear_times[i] = None  # Reset disappear time
-                
-                # If this is the locked target and it reappeared, reset lost time
-                if i == locked_target_index:
-                    lock_lost_time = None
-
-    # Check if lock has been lost for too long (3 seconds)
-    if locked_target_index is not None and lock_lost_time is not None:
-        if time.time() - lock_lost_time > 3:
-            print("Lock lost - target out of radar range for too long")
-            locked_target_index = None
-            lock_lost_time = None
-            
-    # No new targets will be created - we only use the 6 initial targets
-
-    # Draw all targets
-    for i, (angle, distance) in enumerate(targets):
-        # Ensure all arrays are properly initialized and have the same length
-        while len(target_visibilities) <= i:
-            target_visibilities.append(True)
-        while len(target_disappear_times) <= i:
-            target_disappear_times.append(None)
-        while len(target_types) <= i:
-            target_types.append(TARGET_UNKNOWN)
-        while len(target_names) <= i:
-            target_names.append(f"Unknown-{i+1}")
-            
-        # Calculate x and y based on angle and distance for all targets
-        rad_angle = math.radians(angle)
-        x = CENTER_X + distance * math.cos(rad_angle)
-        y = CENTER_Y + distance * math.sin(rad_angle)
-
-        # Get target type and name
-        target_type = target_types[i]
-        target_name = target_names[i]
-        
-        # Only draw visible targets on the radar
-        if target_visibilities[i]:
-            # Draw the radar target with different icons based on type
-            if locked_target_index is not None and i == locked_target_index:
-                # Highlight the locked target with yellow outline
-                canvas.create_oval(x-10, y-10, x+10, y+10, outline="yellow", width=2, tags="target")
-                
-                # Draw different icons based on target type
-                if target_type == TARGET_AIRCRAFT:
-                    # Aircraft - triangle pointing up
-                    canvas.create_polygon(x, y-7, x-6, y+5, x+6, y+5, fill="red", outline="white", tags="target")
-                elif target_type == TARGET_SHIP:
-                    # Ship - diamond shape
-                    canvas.create_polygon(x, y-7, x+7, y, x, y+7, x-7, y, fill="blue", outline="white", tags="target")
-                elif target_type == TARGET_VEHICLE:
-                    # Vehicle - square
-                    canvas.create_rectangle(x-5, y-5, x+5, y+5, fill="green", outline="white", tags="target")
-                else:
-                    # Unknown - circle
-                    canvas.create_oval(x-5, y-5, x+5, y+5, fill="orange", tags="target")
-                    
-                # Show target name near the locked target with background for better visibility
-                text_bg = canvas.create_rectangle(x-60, y-25, x+60, y-10, fill="black", outline="yellow", tags="target")
-                canvas.create_text(x, y-17, text=target_name, fill="yellow", tags="target")
+            # Take every sensor sample that arrived since the last wake-up in one batch
+            with metrics.phase("serial"):
+                sample_angles, sample_distances, sample_times = self.sensors.drain(time.time())
+                if self.raster is not None:
+                    self.raster.add_returns(sample_angles, sample_distances)
+                if len(sample_angles):
+                    engine.add_detections(sample_angles, sample_distances, sample_times)
+                    if recorder is not None:
+                        recorder.record_samples(sample_times, sample_angles, sample_distances)
+
+            # Advance the simulation by as many fixed steps as real time allows
+            steps = scheduler.sim_steps(now)
+            if steps:
+                with metrics.phase("simulation"):
+                    engine.run(steps)
+                if recorder is not None:
+                    recorder.record_tracks(engine.snapshot(), time.time())
+
+        if scheduler.render_due(now):
+            self.draw(engine.snapshot(), refresh_info=scheduler.info_due(now))
+            metrics.frame()
+        self.update_metrics(now)
+
+        # Sleep until the next step or frame is due
+        self.root.after(scheduler.delay_ms(), self.update_radar)
+
+    # Turn the raster display on or off. The PhotoImage and its canvas item
+    # are made on first use and kept for later.
+    def set_raster(self, on):
+        canvas = self.canvas
+        if on:
+            self.raster = PPIRaster(RADIUS)
+            self.raster_time = None
+            if self.raster_item is None:
+                self.raster_image = tk.PhotoImage(master=canvas, width=self.raster.size,
+                                                  height=self.raster.size)
+                self.raster_item = canvas.create_image(CENTER_X - RADIUS, CENTER_Y - RADIUS, anchor="nw",
+                                                       image=self.raster_image, tags="raster")
+                # Keep the range ring and everything else on top of the image
+                canvas.tag_lower(self.raster_item)
+            canvas.itemconfigure(self.raster_item, state="normal")
+        else:
+            self.raster = None
+            if self.raster_item is not None:
+                canvas.itemconfigure(self.raster_item, state="hidden")
+            self.sweep_line.hide()
+
+    # Decay the raster, paint the tracks under the sweep and blit the image
+    def draw_raster(self, snapshot):
+        raster = self.raster
+        now = time.perf_counter()
+        elapsed = 0.0 if self.raster_time is None else now - self.raster_time
+        self.raster_time = now
+        raster.decay(elapsed)
+        raster.sweep_tracks(snapshot.angle, snapshot.distance, snapshot.visible, elapsed)
+        self.raster_image.configure(data=raster.ppm(), format="PPM")
+        rad = math.radians(raster.sweep_angle)
+        self.sweep_line.show(CENTER_X, CENTER_Y, CENTER_X + RADIUS * math.cos(rad),
+                             CENTER_Y + RADIUS * math.sin(rad))
+
+    # Function to draw one engine snapshot. The info panel (status, clock and
+    # target list) is only redrawn when `refresh_info` is set.
+    def draw(self, snapshot, refresh_info=True):
+        locked_target_index = snapshot.locked_index
+
+        # Draw all visible targets, reusing their canvas items from the last frame
+        rad = np.radians(snapshot.angle)
+        radar_xs = snapshot.distance * np.cos(rad)
+        radar_ys = snapshot.distance * np.sin(rad)
+        xs = (CENTER_X + radar_xs).tolist()
+        ys = (CENTER_Y + radar_ys).tolist()
+        angles = snapshot.angle.tolist()
+        distances = snapshot.distance.tolist()
+        metrics = self.metrics
+        with metrics.phase("targets"):
+            self.history.record(snapshot.time, snapshot.track_id, radar_xs, radar_ys, snapshot.visible)
+            if self.raster is not None:
+                self.draw_raster(snapshot)
+                # Only the locked track keeps its vector glyph, label and trail
+                only_locked = np.zeros(len(snapshot), dtype=bool)
+                if locked_target_index is not None and locked_target_index < len(snapshot):
+                    only_locked[locked_target_index] = snapshot.visible[locked_target_index]
+                self.trail_renderer.draw(self.history, snapshot.track_id, only_locked)
+                self.target_renderer.draw(snapshot, xs, ys, angles, locked_target_index, visible=only_locked)
             else:
-                # Draw different icons based on target type (non-locked)
-                if target_type == TARGET_AIRCRAFT:
-                    # Aircraft - triangle pointing up
-                    canvas.create_polygon(x, y-5, x-5, y+3, x+5, y+3, fill="red", tags="target")
-                elif target_type == TARGET_SHIP:
-                    # Ship - diamond shape
-                    canvas.create_polygon(x, y-5, x+5, y, x, y+5, x-5, y, fill="blue", tags="target")
-                elif target_type == TARGET_VEHICLE:
-                    # Vehicle - square
-                    canvas.create_rectangle(x-4, y-4, x+4, y+4, fill="green", tags="target")
-                else:
-                    # Unknown - circle
-                    canvas.create_oval(x-5, y-5, x+5, y+5, fill="orange", tags="target")
-                
-                # Show name next to all targets with semi-transparent background
-                # Calculate position based on angle to prevent text from overlapping with radar edge
-                text_angle = angle
-                if 45 <= angle <= 135:  # Top half of radar
-                    text_y = y - 15
-                    text_x = x
-                elif angle < 45:  # Right side
-                    text_y = y
-                    text_x = x + 15
-                else:  # Left side
-                    text_y = y
-                    text_x = x - 15
-                
-                # Create background for text
-                name_width = len(target_name) * 4 + 10  # Approximate width based on text length
-                canvas.create_rectangle(text_x-name_width/2, text_y-8, text_x+name_width/2, text_y+8, 
-                                        fill="black", outline="", tags="target")
-                canvas.create_text(text_x, text_y, text=target_name, fill="cyan", tags="target")
-
-    # Status info
-    if ser and ser.is_open:
-        status_text = "Connected"
-        port_text = f"Port: {ser.name}"
-        status_color = "green"
-    else:
-        status_text = "Simulation Mode"
-        port_text = "No Serial Connection"
-        status_color = "yellow"
-
-    # Display info texts
-    canvas.create_text(10, 10, text=status_text, fill=status_color, anchor="w", tags="info")
-    canvas.create_text(10, 30, text=port_text, fill="white", anchor="w", tags="info")
-    canvas.create_text(10, 50, text=f"Time: {time.strftime('%H:%M:%S')}", fill="white", anchor="w", tags="info")
-
-    # Box position info
-    canvas.create_text(10, 70, text=f"Box Position: ({box_x-CENTER_X:.0f}, {box_y-CENTER_Y:.0f})", 
-                      fill="cyan", anchor="w", tags="info")
-
-    # Target info to the right of the radar - ensure it fits on screen
-    target_info_x = 570  # Move it more to the right for larger screen
-    canvas.create_text(target_info_x, 10, text="Target Info", fill="white", anchor="w", tags="info")
-    
-    # Only show info for the 5 most recent targets to avoid overflow
-    # Only include targets that are currently visible
-    visible_targets = [(i, target) for i, target in enumerate(targets) 
-                      if i < len(target_visibilities) and target_visibilities[i]]
-    
-    # Sort by distance (closest first)
-    visible_targets.sort(key=lambda x: x[1][1])
-    
-    # Display only up to 5 targets
-    for display_idx, (i, (angle, distance)) in enumerate(visible_targets[:5]):
-        # Get target name and type or use defaults if not available
-        target_name = target_names[i] if i < len(target_names) else f"Unknown-{i+1}"
-        target_type = target_types[i] if i < len(target_types) else TARGET_UNKNOWN
-        
-        # Add icon symbol based on target type
-        type_symbol = "▲" if target_type == TARGET_AIRCRAFT else "◆" if target_type == TARGET_SHIP else "■" if target_type == TARGET_VEHICLE else "●"
-        target_text = f"{type_symbol} {target_name}: {angle:.0f}°, {distance:.0f}cm"
-        # Highlight the locked target in the list
-        text_color = "yellow" if i == locked_target_index else "green"
-        canvas.create_text(target_info_x, 30 + display_idx * 20, 
-                          text=target_text, fill=text_color, anchor="w", tags="info")
-    
-    # Show count of additional targets if there are more than 5
-    if len(visible_targets) > 5:
-        canvas.create_text(target_info_x, 30 + 5 * 20, 
-                          text=f"+ {len(visible_targets) - 5} more", 
-                          fill="gray", anchor="w", tags="info")
-
-    # Display lock information if a target is locked
-    if locked_target_index is not None and locked_target_index < len(targets):
-        # Get the current position of the locked target
-        locked_target = targets[locked_target_index]
-        
-        # Calculate time since lock
-        time_since_lock = time.time() - lock_time
-        
-        # Generate random altitude based on the distance (for simulation)
-        altitude = locked_target[1] * 10  # 10 times the distance for altitude in meters
-        
-        # Calculate time until impact (simulated - decreases over time)
-        impact_time = max(30 - time_since_lock, 0)  # Start with 30 seconds, countdown
-        
-        # Display lock information to the right of the box
-        lock_x = box_x + box_size // 2 + 10
-        lock_y = box_y
-        
-        # Get target name and type
-        target_name = target_names[locked_target_index] if locked_target_index < len(target_names) else "Unknown"
-        target_type = target_types[locked_target_index] if locked_target_index < len(target_types) else TARGET_UNKNOWN
-        
-        # Get type description
-        type_desc = "Aircraft" if target_type == TARGET_AIRCRAFT else "Ship" if target_type == TARGET_SHIP else "Vehicle" if target_type == TARGET_VEHICLE else "Unknown"
-        
-        # Only draw the targeting line if the target is currently visible
-        if locked_target_index < len(target_visibilities) and target_visibilities[locked_target_index]:
-            canvas.create_text(lock_x, lock_y - 45, text=f"TARGET: {target_name}", 
-                              fill="yellow", anchor="w", tags="lock_info")
-            canvas.create_text(lock_x, lock_y - 30, text=f"TYPE: {type_desc}", 
-                              fill="yellow", anchor="w", tags="lock_info")
-            canvas.create_text(lock_x, lock_y - 15, text=f"LOCKED", 
-                              fill="yellow", anchor="w", tags="lock_info")
-            canvas.create_text(lock_x, lock_y, text=f"Alt: {altitude:.0f}m", 
-                              fill="white", anchor="w", tags="lock_info")
-            canvas.create_text(lock_x, lock_y + 15, text=f"Impact: {impact_time:.1f}s", 
-                              fill="red", anchor="w", tags="lock_info")
-            
-            # Draw a targeting line from box to locked target - updates with target movement
-            rad_angle = math.radians(locked_target[0])
-            target_x = CENTER_X + locked_target[1] * math.cos(rad_angle)
-            target_y = CENTER_Y + locked_target[1] * math.sin(rad_angle)
-            canvas.create_line(box_x, box_y, target_x, target_y, 
-                              fill="yellow", dash=(3, 2), tags="lock_info")
+                self.trail_renderer.draw(self.history, snapshot.track_id, snapshot.visible)
+                self.target_renderer.draw(snapshot, xs, ys, angles, locked_target_index)
+        if refresh_info:
+            with metrics.phase("info"):
+                self.draw_info(snapshot, angles, distances)
+                if self.show_overlay:
+                    self.draw_overlay()
+        with metrics.phase("lock"):
+            self.draw_lock(snapshot, xs, ys, angles, distances)
+
+    # Pull in the counters kept by the reader thread and the scheduler, and
+    # roll the metrics window
+    def update_metrics(self, now):
+        metrics = self.metrics
+        sensors = self.sensors
+        metrics.set_total("serial_bytes", sensors.bytes_read)
+        metrics.set_total("parse_errors", sensors.errors)
+        metrics.set_total("ring_overruns", sensors.overruns)
+        metrics.set_total("samples_dropped", sensors.dropped)
+        if self.feed is not None:
+            metrics.set_total("serial_bytes", self.feed.bytes_read)
+        metrics.set_total("frames_dropped", self.scheduler.frames_dropped)
+        clutter = self.engine.clutter
+        if clutter is not None:
+            metrics.set_total("clutter_samples", clutter.samples)
+            metrics.set_total("clutter_suppressed", clutter.suppressed)
+        if metrics.tick(now) and self.metrics_writer is not None:
+            self.metrics_writer.write(metrics.report)
+
+    # Performance overlay under the status text, from the last full report
+    def draw_overlay(self):
+        report = self.metrics.report
+        panel = self.overlay_panel
+        panel.begin()
+        if report:
+            panel.text(10, 95, text=f"Frame: {report['fps']:.1f} fps, "
+                                    f"{report['frames_dropped_per_s']:.0f} dropped/s", fill="gray")
+            for row, name in enumerate(("serial", "simulation", "targets", "info", "lock")):
+                panel.text(10, 115 + row * 15,
+                           text=f"{name}: {report[name + '_ms']:.2f} ms (max {report[name + '_max_ms']:.2f})",
+                           fill="gray")
+            panel.text(10, 195, text=f"Items: +{report['items_created_per_frame']:.1f} "
+                                     f"-{report['items_deleted_per_frame']:.1f} per frame", fill="gray")
+            panel.text(10, 210, text=f"Serial: {report['serial_bytes_per_s']:.0f} B/s, "
+                                     f"{report['parse_errors_total']:.0f} errors, "
+                                     f"{report['ring_overruns_total']:.0f} overruns, "
+                                     f"{report['samples_dropped_total']:.0f} dropped", fill="gray")
+            if "clutter_samples_per_s" in report:
+                samples = report["clutter_samples_per_s"]
+                ratio = report["clutter_suppressed_per_s"] / samples if samples else 0.0
+                panel.text(10, 225, text=f"Clutter: {ratio:.0%} suppressed "
+                                         f"({self.engine.clutter.suppression_ratio:.0%} overall)", fill="gray")
+        panel.end()
+
+    def draw_info(self, snapshot, angles, distances):
+        box_x, box_y = self.box_x, self.box_y
+        locked_target_index = snapshot.locked_index
+        info_panel = self.info_panel
+
+        # Status info
+        sensors = self.sensors
+        feed = self.feed
+        if feed is not None:
+            status_text = "Connected" if feed.error is None else "Feed lost"
+            port_text = f"Feed: {feed.address}"
+            status_color = "green" if feed.error is None else "red"
+        elif sensors.is_open:
+            status_text = "Connected"
+            if len(sensors) == 1:
+                port_text = f"Port: {sensors.names[0]}"
+            else:
+                port_text = f"Ports: {len(sensors)} sensors"
+            status_color = "green"
+        else:
+            status_text = "Simulation Mode"
+            port_text = "No Serial Connection"
+            status_color = "yellow"
+
+        # Display info texts
+        info_panel.begin()
+        info_panel.text(10, 10, text=status_text, fill=status_color)
+        info_panel.text(10, 30, text=port_text, fill="white")
+        info_panel.text(10, 50, text=f"Time: {time.strftime('%H:%M:%S')}", fill="white")
+
+        # Box position info
+        info_panel.text(10, 70, text=f"Box Position: ({box_x-CENTER_X:.0f}, {box_y-CENTER_Y:.0f})",
+                        fill="cyan")
+
+        # Target info to the right of the radar - ensure it fits on screen
+        target_info_x = 570  # Move it more to the right for larger screen
+        info_panel.text(target_info_x, 10, text="Target Info", fill="white")
+
+        # Only show info for the 5 most recent targets to avoid overflow
+        # Only include targets that are currently visible
+        # Sort by distance (closest first)
+        visible_idx = np.flatnonzero(snapshot.visible)
+        visible_targets = visible_idx[np.argsort(snapshot.distance[visible_idx], kind="stable")]
+
+        # Display only up to 5 targets
+        for display_idx, i in enumerate(visible_targets[:5].tolist()):
+            angle = angles[i]
+            distance = distances[i]
+            # Get target name and type
+            target_name = snapshot.names[i]
+            target_type = snapshot.type_name(i)
+
+            # Add icon symbol based on target type
+            type_symbol = "▲" if target_type == TARGET_AIRCRAFT else "◆" if target_type == TARGET_SHIP else "■" if target_type == TARGET_VEHICLE else "●"
+            target_text = f"{type_symbol} {target_name}: {angle:.0f}°, {distance:.0f}cm"
+            # Highlight the locked target in the list
+            text_color = "yellow" if i == locked_target_index else "green"
+            info_panel.text(target_info_x, 30 + display_idx * 20,
+                            text=target_text, fill=text_color)
+
+        # Show count of additional targets if there are more than 5
+        if len(visible_targets) > 5:
+            info_panel.text(target_info_x, 30 + 5 * 20,
+                            text=f"+ {len(visible_targets) - 5} more",
+                            fill="gray")
+
+        info_panel.end()
+
+    def draw_lock(self, snapshot, xs, ys, angles, distances):
+        box_x, box_y = self.box_x, self.box_y
+        locked_target_index = snapshot.locked_index
+        lock_panel = self.lock_panel
+
+        # Display lock information if a target is locked
+        lock_panel.begin()
+        if locked_target_index is not None and locked_target_index < len(snapshot):
+            # Get the current position of the locked target
+            locked_target = (angles[locked_target_index], distances[locked_target_index])
+
+            # Speed and heading from the track's recorded positions; the
+            # closing speed along the line of sight gives the time to impact
+            velocity = self.history.velocity(int(snapshot.track_id[locked_target_index]))
+            if velocity is not None:
+                vx, vy = velocity
+                speed = math.hypot(vx, vy)
+                heading = math.degrees(math.atan2(vy, vx)) % 360
+                rad = math.radians(locked_target[0])
+                closing = -(vx * math.cos(rad) + vy * math.sin(rad))
+                motion_text = f"Speed: {speed:.1f} cm/s  Hdg: {heading:.0f}°"
+                impact_text = f"Impact: {locked_target[1] / closing:.1f}s" if closing > 0.1 else "Impact: opening"
+            else:
+                motion_text = "Speed: --"
+                impact_text = "Impact: --"
+
+            # Display lock information to the right of the box
+            lock_x = box_x + self.box_size // 2 + 10
+            lock_y = box_y
+
+            # Get target name and type
+            target_name = snapshot.names[locked_target_index]
+            target_type = snapshot.type_name(locked_target_index)
+
+            # Get type description
+            type_desc = "Aircraft" if target_type == TARGET_AIRCRAFT else "Ship" if target_type == TARGET_SHIP else "Vehicle" if target_type == TARGET_VEHICLE else "Unknown"
+
+            # Only draw the targeting line if the target is currently visible
+            if snapshot.visible[locked_target_index]:
+                lock_panel.text(lock_x, lock_y - 45, text=f"TARGET: {target_name}",
+                                fill="yellow")
+                lock_panel.text(lock_x, lock_y - 30, text=f"TYPE: {type_desc}",
+                                fill="yellow")
+                lock_panel.text(lock_x, lock_y - 15, text=f"LOCKED",
+                                fill="yellow")
+                lock_panel.text(lock_x, lock_y, text=motion_text,
+                                fill="white")
+                lock_panel.text(lock_x, lock_y + 15, text=impact_text,
+                                fill="red")
+
+                # Draw a targeting line from box to locked target - updates with target movement
+                self.lock_line.show(box_x, box_y, xs[locked_target_index], ys[locked_target_index])
+            else:
+                self.lock_line.hide()
+                # Target is not visible, show "TRACKING" instead of "LOCKED"
+                lock_panel.text(lock_x, lock_y - 15, text=f"TRACKING...",
+                                fill="orange")
+                lock_panel.text(lock_x, lock_y, text=f"Signal lost",
+                                fill="orange")
+                lock_panel.text(lock_x, lock_y + 15, text=f"Reacquiring target",
+                                fill="orange")
         else:
-            # Target is not visible, show "TRACKING" instead of "LOCKED"
-            canvas.create_text(lock_x, lock_y - 15, text=f"TRACKING...", 
-                              fill="orange", anchor="w", tags="lock_info")
-            canvas.create_text(lock_x, lock_y, text=f"Signal lost", 
-                              fill="orange", anchor="w", tags="lock_info")
-            canvas.create_text(lock_x, lock_y + 15, text=f"Reacquiring target", 
-                              fill="orange", anchor="w", tags="lock_info")
-        
-    # Refresh every 150ms (0.15 seconds) - slightly slower refresh rate for smoother movement
-    root.after(150, update_radar)
-
-# Start updating the radar
-update_radar()
-root.mainloop()
+            self.lock_line.hide()
+        lock_panel.end()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Radar display")
+    parser.add_argument("--record", metavar="LOG", help="record samples and track states to this log file")
+    parser.add_argument("--replay", metavar="LOG", help="play back a recorded log instead of the sensor")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--start", type=float, default=0.0, help="seconds into the replay log to start from")
+    parser.add_argument("--fps", type=float, default=RENDER_FPS, help="target display frame rate")
+    add_sensor_arguments(parser)
+    add_clutter_arguments(parser)
+    parser.add_argument("--connect", metavar="ADDRESS",
+                        help="draw the tracks published by radar_server.py (host:port or socket path)")
+    parser.add_argument("--raster", action="store_true",
+                        help="start with the raster PPI display instead of vector targets (toggle with R)")
+    parser.add_argument("--overlay", action="store_true", help="show the performance overlay (toggle with M)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write performance metrics every second (.prom for Prometheus text, else CSV)")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    clutter = make_clutter(args)
+    engine = RadarEngine(verbose=True, clutter=clutter)
+    recorder = replayer = sensors = feed = None
+    if args.connect:
+        feed = FeedClient(args.connect)
+        feed.start()
+    elif args.replay:
+        replayer = Replayer(LogReader(args.replay), speed=args.speed)
+        replayer.seek(args.start)
+    else:
+        sensors = open_hub(args)
+        if args.record:
+            recorder = LogRecorder(args.record)
+    metrics_writer = MetricsWriter(args.metrics) if args.metrics else None
+    app = RadarApp(root, engine, sensors, recorder=recorder, replayer=replayer, fps=args.fps,
+                   overlay=args.overlay, metrics_writer=metrics_writer, feed=feed,
+                   raster=args.raster)
+    # Start updating the radar
+    app.update_radar()
+    root.mainloop()
+    if recorder is not None:
+        recorder.close()
+    if metrics_writer is not None:
+        metrics_writer.close()
+    save_clutter(clutter, args)
+
+
+if __name__ == "__main__":
+    main()
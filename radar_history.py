@@ -0,0 +1,168 @@
+import numpy as np
+
+HISTORY_LENGTH = 64  # Positions kept per track
+HISTORY_INTERVAL = 0.25  # Seconds between recorded positions (64 x 0.25 s = 16 s of trail)
+TRAIL_POINTS = 16  # Most points drawn per trail
+TRAIL_SPACING = 4.0  # Trail points closer than about this (display units) are merged
+VELOCITY_WINDOW = 2.0  # Seconds of history the velocity is fitted over
+MAX_SPEED = 200.0  # Display units per second no track moves faster than
+MAX_JUMP = 100.0  # Longest move between two recorded positions, however far apart in time
+
+
+# Position history of every track, in fixed-size ring buffers. Row `slot`
+# of the x, y and time arrays is one track's ring; a track ID gets a slot
+# when first seen and gives it back as soon as it is no longer in the
+# track table, so memory only depends on how many tracks exist at once
+# and never on how long the session runs. Positions are radar-frame x, y
+# (display units from the centre), recorded for every visible track at
+# most once per HISTORY_INTERVAL of track time, one vectorized write per
+# record. A move no track could make (a simulated target's angle wrapping
+# from 180 to 0 degrees) starts that track's ring over, so trails and
+# velocities never span the jump.
+class TrackHistory:
+    def __init__(self, length=HISTORY_LENGTH, interval=HISTORY_INTERVAL, capacity=64):
+        self.length = length
+        self.interval = interval
+        capacity = max(int(capacity), 1)
+        self._x = np.zeros((capacity, length), dtype=np.float32)
+        self._y = np.zeros((capacity, length), dtype=np.float32)
+        self._t = np.zeros((capacity, length))
+        self._head = np.zeros(capacity, dtype=np.intp)  # Next write position
+        self._count = np.zeros(capacity, dtype=np.intp)
+        self.slot_of = {}  # Track ID -> slot
+        self.free = list(range(capacity - 1, -1, -1))
+        self.last_time = None
+        self.version = 0  # Bumped on every record, so drawing can skip unchanged history
+        self._ids = None  # IDs and slots of the last record, reused while the table is unchanged
+        self._slots = None
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def _grow(self):
+        capacity = len(self._head)
+        for attr in ("_x", "_y", "_t"):
+            old = getattr(self, attr)
+            new = np.zeros((capacity * 2, self.length), dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, attr, new)
+        for attr in ("_head", "_count"):
+            old = getattr(self, attr)
+            new = np.zeros(capacity * 2, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, attr, new)
+        self.free.extend(range(capacity * 2 - 1, capacity - 1, -1))
+
+    # Slots of `ids`, giving new IDs a slot and freeing the slots of IDs
+    # that are gone
+    def _assign(self, ids):
+        if self._ids is not None and len(ids) == len(self._ids) and np.array_equal(ids, self._ids):
+            return self._slots
+        slot_of = self.slot_of
+        current = ids.tolist()
+        for track_id in set(slot_of).difference(current):
+            slot = slot_of.pop(track_id)
+            self._count[slot] = 0
+            self._head[slot] = 0
+            self.free.append(slot)
+        slots = []
+        for track_id in current:
+            slot = slot_of.get(track_id)
+            if slot is None:
+                if not self.free:
+                    self._grow()
+                slot = slot_of[track_id] = self.free.pop()
+            slots.append(slot)
+        self._ids = ids.copy()
+        self._slots = np.array(slots, dtype=np.intp)
+        return self._slots
+
+    # Record the positions of the visible tracks if `interval` has passed
+    # since the last record. A clock that runs backwards (a replay seek)
+    # starts the history over. Returns True if anything was recorded.
+    def record(self, now, ids, xs, ys, visible):
+        if self.last_time is not None:
+            if now < self.last_time:
+                self.clear()
+            elif now - self.last_time < self.interval:
+                return False
+        self.last_time = now
+        visible = np.asarray(visible, dtype=bool)
+        slots = self._assign(np.asarray(ids))[visible]
+        xs = np.asarray(xs)[visible]
+        ys = np.asarray(ys)[visible]
+        heads = self._head[slots]
+        previous = (heads - 1) % self.length
+        elapsed = now - self._t[slots, previous]
+        jump = np.hypot(xs - self._x[slots, previous], ys - self._y[slots, previous])
+        broken = (self._count[slots] > 0) & (jump > np.minimum(MAX_SPEED * elapsed, MAX_JUMP))
+        self._count[slots[broken]] = 0
+        self._x[slots, heads] = xs
+        self._y[slots, heads] = ys
+        self._t[slots, heads] = now
+        self._head[slots] = (heads + 1) % self.length
+        self._count[slots] = np.minimum(self._count[slots] + 1, self.length)
+        self.version += 1
+        return True
+
+    # The rings of `ids` in time order as (x, y, t, valid) arrays of shape
+    # (len(ids), length); unused entries (the start of a ring that hasn't
+    # filled yet, or IDs with no history) have valid False
+    def ordered(self, ids):
+        slots = np.array([self.slot_of.get(track_id, -1) for track_id in ids], dtype=np.intp)
+        known = slots >= 0
+        slots = np.where(known, slots, 0)
+        order = (self._head[slots][:, None] + np.arange(self.length)) % self.length
+        rows = slots[:, None]
+        valid = np.arange(self.length) >= (self.length - self._count[slots])[:, None]
+        valid &= known[:, None]
+        return self._x[rows, order], self._y[rows, order], self._t[rows, order], valid
+
+    # Decimated trails of `ids` as (x, y, keep) arrays: keep marks at most
+    # `max_points` points per row to draw, newest included. Points are
+    # first thinned by distance (a point is dropped if it falls in the same
+    # `spacing` sized grid cell as the point before it, so a parked track
+    # has no trail), then evenly strided down to `max_points`.
+    def trails(self, ids, max_points=TRAIL_POINTS, spacing=TRAIL_SPACING):
+        x, y, _, valid = self.ordered(ids)
+        if not len(ids):
+            return x, y, valid
+        cx = np.floor(x / spacing)
+        cy = np.floor(y / spacing)
+        moved = np.ones_like(valid)
+        moved[:, 1:] = (cx[:, 1:] != cx[:, :-1]) | (cy[:, 1:] != cy[:, :-1]) | ~valid[:, :-1]
+        keep = valid & moved
+        keep[:, -1] = valid[:, -1]
+        rank = np.cumsum(keep, axis=1) - 1
+        total = rank[:, -1:] + 1
+        stride = np.maximum(-(-total // max_points), 1)
+        keep &= (total - 1 - rank) % stride == 0
+        return x, y, keep
+
+    # Velocity of a track (display units per second, radar-frame x and y)
+    # fitted by least squares over the last `window` seconds of history, or
+    # None with fewer than two positions to go on
+    def velocity(self, track_id, window=VELOCITY_WINDOW):
+        slot = self.slot_of.get(track_id)
+        if slot is None or self._count[slot] < 2:
+            return None
+        x, y, t, valid = self.ordered([track_id])
+        valid = valid[0] & (t[0] >= t[0, -1] - window)
+        if valid.sum() < 2:
+            return None
+        t = t[0, valid]
+        t = t - t.mean()
+        denominator = (t * t).sum()
+        if denominator <= 0:
+            return None
+        return float((t * x[0, valid]).sum() / denominator), float((t * y[0, valid]).sum() / denominator)
+
+    def clear(self):
+        self.slot_of.clear()
+        self.free = list(range(len(self._head) - 1, -1, -1))
+        self._head[:] = 0
+        self._count[:] = 0
+        self._ids = None
+        self._slots = None
+        self.last_time = None
+        self.version += 1
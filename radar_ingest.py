@@ -0,0 +1,245 @@
+import threading
+import time
+import warnings
+import numpy as np
+from radar_protocol import FrameDecoder, decode_frame, MAX_FRAME_SIZE
+
+TICKS_PERIOD = 1 << 30  # MicroPython's ticks_us() wraps at this
+CLOCK_DRIFT = 1e-4  # How fast (s/s) the device clock offset estimate is allowed to creep up
+
+
+# Preallocated ring buffer of (angle, distance, timestamp) samples shared
+# between the serial reader thread and the GUI. When the GUI falls behind and
+# the ring fills up, new samples are dropped and counted as overruns rather
+# than overwriting samples that haven't been drawn yet.
+class SampleRing:
+    def __init__(self, capacity=65536):
+        self.capacity = int(capacity)
+        self.angle = np.zeros(self.capacity)
+        self.distance = np.zeros(self.capacity)
+        self.timestamp = np.zeros(self.capacity)
+        self.head = 0  # Total samples ever written
+        self.tail = 0  # Total samples ever read
+        self.overruns = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.head - self.tail
+
+    # Copy a batch of samples into the ring. Returns how many were stored.
+    def push(self, angles, distances, timestamps):
+        n = len(angles)
+        with self.lock:
+            free = self.capacity - (self.head - self.tail)
+            if n > free:
+                self.overruns += n - free
+                n = free
+            if n == 0:
+                return 0
+            start = self.head % self.capacity
+            first = min(n, self.capacity - start)
+            rest = n - first
+            self.angle[start:start + first] = angles[:first]
+            self.distance[start:start + first] = distances[:first]
+            self.timestamp[start:start + first] = timestamps[:first]
+            if rest:
+                self.angle[:rest] = angles[first:n]
+                self.distance[:rest] = distances[first:n]
+                self.timestamp[:rest] = timestamps[first:n]
+            self.head += n
+        return n
+
+    # Take everything that arrived since the last drain as three arrays
+    def drain(self):
+        with self.lock:
+            n = self.head - self.tail
+            start = self.tail % self.capacity
+            idx = (start + np.arange(n)) % self.capacity
+            batch = (self.angle[idx], self.distance[idx], self.timestamp[idx])
+            self.tail = self.head
+        return batch
+
+
+# Incremental parser for the firmware's ASCII "angle,distance\n" lines.
+# Complete lines are parsed in one NumPy call per chunk; anything that
+# doesn't fit the format (debug prints, line noise) falls back to a per-line
+# parse and is counted in `errors`. Like FrameDecoder, feed() returns
+# (angles, distances, ticks), but text lines carry no device ticks.
+class AsciiParser:
+    def __init__(self):
+        self.pending = bytearray()
+        self.errors = 0
+
+    def feed(self, data):
+        pending = self.pending
+        pending += data
+        end = pending.rfind(b"\n")
+        if end < 0:
+            return np.empty(0), np.empty(0), None
+        chunk = bytes(pending[:end])
+        del pending[:end + 1]
+        lines = chunk.count(b"\n") + 1
+        # Every line must have exactly one comma, or values would pair up
+        # across lines ("1,2,3\n4" reads as two samples)
+        raw = np.frombuffer(chunk, dtype=np.uint8)
+        commas = np.bincount(np.cumsum(raw == ord("\n"))[raw == ord(",")], minlength=lines)
+        if (commas != 1).any():
+            return self._feed_slow(chunk)
+        try:
+            with warnings.catch_warnings():
+                # Older NumPy warns instead of raising on unparsable text
+                warnings.simplefilter("ignore")
+                values = np.fromstring(chunk.replace(b"\n", b","), dtype=float, sep=",")
+        except ValueError:
+            return self._feed_slow(chunk)
+        if len(values) == 2 * lines:
+            values = values.reshape(-1, 2)
+            return values[:, 0], values[:, 1], None
+        return self._feed_slow(chunk)
+
+    def _feed_slow(self, chunk):
+        angles = []
+        distances = []
+        for line in chunk.split(b"\n"):
+            try:
+                angle, distance = line.split(b",")
+                angles.append(float(angle))
+                distances.append(float(distance))
+            except ValueError:
+                if line.strip():
+                    self.errors += 1
+        return np.array(angles, dtype=float), np.array(distances, dtype=float), None
+
+
+# Parser that works out which format the firmware is sending. COBS frames
+# are zero-delimited and zero never appears in the text format, so the
+# stream switches over to the binary decoder for good at the first zero
+# byte that ends a frame that actually decodes. A stray zero on a text link
+# only costs the line it landed in.
+class AutoParser:
+    def __init__(self):
+        self.ascii = AsciiParser()
+        self.binary = FrameDecoder()
+        self.is_binary = False
+
+    @property
+    def errors(self):
+        return self.ascii.errors + self.binary.errors
+
+    def feed(self, data):
+        if self.is_binary:
+            return self.binary.feed(data)
+        if b"\x00" not in data:
+            return self.ascii.feed(data)
+        # The first frame may have started in an earlier read that is
+        # still sitting in the text parser's partial line
+        data = bytes(self.ascii.pending) + data
+        self.ascii.pending.clear()
+        split = self._frame_start(data)
+        if split is None:
+            return self.ascii.feed(data)
+        self.is_binary = True
+        # Finish off any text lines that came before the first frame
+        angles, distances, _ = self.ascii.feed(data[:split])
+        self.ascii.pending.clear()
+        frame_angles, frame_distances, ticks = self.binary.feed(data[split:])
+        if len(angles):
+            return (np.concatenate((angles, frame_angles)),
+                    np.concatenate((distances, frame_distances)), None)
+        return frame_angles, frame_distances, ticks
+
+    # Where the first frame in `data` starts: the first offset from which
+    # the bytes up to one of the zeros decode as a valid frame, or None if
+    # no zero ends a frame. Encoded frames can contain newline bytes, so the
+    # text before a frame can't be split off at the last newline. A frame
+    # that doesn't follow a newline cut a text line short, which is counted
+    # as an error.
+    def _frame_start(self, data):
+        previous = -1
+        end = data.find(b"\x00")
+        while end >= 0:
+            for start in range(max(previous + 1, end - MAX_FRAME_SIZE), end):
+                if decode_frame(data[start:end]) is not None:
+                    if start and data[start - 1] not in b"\n\x00":
+                        self.ascii.errors += 1
+                    return start
+            previous = end
+            end = data.find(b"\x00", end + 1)
+        return None
+
+
+# Maps a board's wrapping ticks_us() timestamps onto the host clock. Ticks
+# are unwrapped into a running count of device microseconds, and the
+# offset to host time is the smallest (host arrival - device time) seen, so
+# it converges on the lowest-latency sample. The estimate creeps up by
+# CLOCK_DRIFT per second so that a device clock running slow is followed too.
+class DeviceClock:
+    def __init__(self, period=TICKS_PERIOD):
+        self.period = period
+        self.last_tick = None
+        self.device_us = 0
+        self.offset = None
+        self.offset_time = None
+
+    # Host times for a batch of raw ticks that arrived at host time `now`
+    def to_host(self, ticks, now):
+        ticks = np.asarray(ticks, dtype=np.int64)
+        half = self.period // 2
+        if self.last_tick is None:
+            self.last_tick = int(ticks[0])
+        steps = np.diff(ticks, prepend=self.last_tick)
+        steps = (steps + half) % self.period - half
+        device_us = self.device_us + np.cumsum(steps)
+        self.last_tick = int(ticks[-1])
+        self.device_us = int(device_us[-1])
+        device = device_us / 1e6
+        offset = now - device[-1]
+        if self.offset is None:
+            self.offset = offset
+        else:
+            self.offset = min(self.offset + (now - self.offset_time) * CLOCK_DRIFT, offset)
+        self.offset_time = now
+        return device + self.offset
+
+
+# Background thread that reads the serial port in bulk, parses whatever
+# arrived and pushes the samples into a SampleRing for the GUI to drain.
+# Samples are stamped with the board's own tick converted to host time when
+# the format carries one, and with the arrival time otherwise.
+class SerialReader(threading.Thread):
+    def __init__(self, ser, ring, parser=None):
+        super().__init__(daemon=True)
+        self.ser = ser
+        self.ring = ring
+        self.parser = parser if parser is not None else AutoParser()
+        self.clock = DeviceClock()
+        self.bytes_read = 0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        ser = self.ser
+        while not self._stop_event.is_set():
+            try:
+                # Block for at most the port timeout waiting for the first
+                # byte, then take everything else that is already buffered
+                data = ser.read(ser.in_waiting or 1)
+            except Exception as e:
+                self.error = e
+                print(f"Serial read failed: {e}")
+                break
+            if not data:
+                continue
+            self.bytes_read += len(data)
+            angles, distances, ticks = self.parser.feed(data)
+            if len(angles):
+                now = time.time()
+                if ticks is not None and len(ticks) == len(angles):
+                    timestamps = self.clock.to_host(ticks, now)
+                else:
+                    timestamps = np.full(len(angles), now)
+                self.ring.push(angles, distances, timestamps)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
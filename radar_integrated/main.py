@@ -1,45 +1,199 @@
-from machine import Pin, UART
-import time
+import struct
+try:
+    import machine
+    import time
+except ImportError:
+    # Not on the board: run against the simulated pins/UART in sim_machine.py
+    import sim_machine as machine
+    time = machine.utime
+
+Pin = machine.Pin
 
 # UART0 is used for onboard USB serial communication
-uart = UART(0, baudrate=9600)
+uart = machine.UART(0, baudrate=9600)
 
 # Ultrasonic sensor pins
 TRIG = Pin(2, Pin.OUT)
 ECHO = Pin(3, Pin.IN)
 
-# Function to measure distance
+# Sweep servo on a 50Hz PWM pin
+SERVO = machine.PWM(Pin(15))
+SERVO.freq(50)
+
+# Sampling settings
+SAMPLE_HZ = 10  # Samples sent per second
+PINGS_PER_SAMPLE = 3  # Pings median-filtered into each sample
+PING_GAP_US = 1000  # Pause between the pings of one burst
+ECHO_TIMEOUT_US = 25000  # Give up on an echo after this long (~4.3m range)
+SWEEP_STEP = 2  # Degrees the servo moves between samples
+
+# Send samples as binary frames (see radar_protocol.py on the host) instead
+# of "angle,distance" text lines
+BINARY_MODE = True
+# Print debug messages (these share the USB serial link with the data)
+DEBUG = False
+
+# Binary frame layout: version u8, count u8, count * (angle u16 in 0.01 deg,
+# distance u16 in mm, tick u32 in us, sequence u16), crc16 u16, all
+# little-endian, COBS encoded and terminated with a zero byte
+FRAME_VERSION = 1
+SAMPLE_FORMAT = "<HHIH"
+SAMPLE_SIZE = 10
+BATCH_SIZE = 8  # Samples per frame (at most 24)
+FLUSH_MS = 500  # Send a partial frame if the oldest sample is this old
+
+# CRC-16/CCITT lookup table (poly 0x1021)
+CRC_TABLE = []
+for i in range(256):
+    crc = i << 8
+    for _ in range(8):
+        crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+    CRC_TABLE.append(crc & 0xFFFF)
+
+def crc16(data, length):
+    crc = 0xFFFF
+    for i in range(length):
+        crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[(crc >> 8) ^ data[i]]
+    return crc
+
+# COBS encode `length` bytes of `data` into `out`, returning the encoded size
+def cobs_encode(data, length, out):
+    code_pos = 0
+    code = 1
+    j = 1
+    for i in range(length):
+        byte = data[i]
+        if byte == 0:
+            out[code_pos] = code
+            code_pos = j
+            j += 1
+            code = 1
+        else:
+            out[j] = byte
+            j += 1
+            code += 1
+    out[code_pos] = code
+    return j
+
+# Collects samples into a preallocated frame buffer and sends it when full
+class FrameWriter:
+    def __init__(self, uart, batch_size):
+        self.uart = uart
+        self.batch_size = batch_size
+        self.frame = bytearray(2 + batch_size * SAMPLE_SIZE + 2)
+        self.encoded = bytearray(len(self.frame) + 2)
+        self.count = 0
+        self.seq = 0
+        self.first_ms = 0
+
+    def add(self, angle, distance, tick):
+        if self.count == 0:
+            self.first_ms = time.ticks_ms()
+        struct.pack_into(SAMPLE_FORMAT, self.frame, 2 + self.count * SAMPLE_SIZE,
+                         min(int(angle * 100), 0xFFFF), min(int(distance * 10), 0xFFFF),
+                         tick & 0xFFFFFFFF, self.seq)
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.count += 1
+        if self.count == self.batch_size:
+            self.flush()
+
+    # Send any partial frame that has been waiting too long
+    def poll(self):
+        if self.count and time.ticks_diff(time.ticks_ms(), self.first_ms) >= FLUSH_MS:
+            self.flush()
+
+    def flush(self):
+        if not self.count:
+            return
+        frame = self.frame
+        length = 2 + self.count * SAMPLE_SIZE
+        frame[0] = FRAME_VERSION
+        frame[1] = self.count
+        struct.pack_into("<H", frame, length, crc16(frame, length))
+        size = cobs_encode(frame, length + 2, self.encoded)
+        self.encoded[size] = 0
+        self.uart.write(memoryview(self.encoded)[:size + 1])
+        self.count = 0
+
+# Function to measure distance. The echo pulse is timed by time_pulse_us,
+# which gives up after ECHO_TIMEOUT_US, so a missing echo can't hang the
+# loop. Returns None when no echo came back.
 def measure_distance():
     TRIG.low()
     time.sleep_us(2)
     TRIG.high()
     time.sleep_us(10)
     TRIG.low()
-    
-    while ECHO.value() == 0:
-        start = time.ticks_us()
-    
-    while ECHO.value() == 1:
-        end = time.ticks_us()
-    
-    duration = time.ticks_diff(end, start)
+
+    duration = machine.time_pulse_us(ECHO, 1, ECHO_TIMEOUT_US)
+    if duration < 0:
+        return None
     distance = (duration * 0.0343) / 2  # Convert to cm
     return distance
 
-# Main loop
-while True:
-    print("Starting to send data...")  # Debug: Check if loop starts
-    
-    distance = measure_distance()
-    
-    # Format the data as angle and distance
-    angle = 90  # Just an example angle for now (could be dynamic based on your servo)
-    data = f"{angle},{distance}\n"
-    
-    print(f"Sending data: {data}")  # Debug: Check what is being sent
-    
-    # Send data via UART (USB serial)
-    uart.write(data)
-    
-    # Add a small delay to avoid flooding the serial port
-    time.sleep(1)
+# Fire a burst of pings and return the median of the ones that echoed
+def sample_distance(pings):
+    readings = []
+    for i in range(pings):
+        if i:
+            time.sleep_us(PING_GAP_US)
+        distance = measure_distance()
+        if distance is not None:
+            readings.append(distance)
+    if not readings:
+        return None
+    readings.sort()
+    return readings[len(readings) // 2]
+
+# Point the servo at `angle` degrees (0.5ms-2.5ms pulse over 0-180)
+def set_angle(angle):
+    pulse_us = 500 + angle * 2000 // 180
+    SERVO.duty_u16(pulse_us * 65535 // 20000)
+
+writer = FrameWriter(uart, BATCH_SIZE)
+
+# Main loop. Runs forever on the board; max_steps lets a simulation stop.
+def run(max_steps=None):
+    if DEBUG:
+        print("Starting to send data...")  # Debug: Check if loop starts
+    period_us = 1000000 // SAMPLE_HZ
+    angle = 0
+    step = SWEEP_STEP
+    set_angle(angle)
+    deadline = time.ticks_add(time.ticks_us(), period_us)
+    steps = 0
+    while max_steps is None or steps < max_steps:
+        steps += 1
+        distance = sample_distance(PINGS_PER_SAMPLE)
+
+        if distance is not None:
+            if BINARY_MODE:
+                writer.add(angle, distance, time.ticks_us())
+            else:
+                data = f"{angle},{distance}\n"
+                # Send data via UART (USB serial)
+                uart.write(data)
+
+            if DEBUG:
+                print(f"Sample: {angle},{distance}")  # Debug: Check what is being sent
+        if BINARY_MODE:
+            writer.poll()
+
+        # Step the sweep, reversing at either end
+        if not 0 <= angle + step <= 180:
+            step = -step
+        angle += step
+        set_angle(angle)
+
+        # Wait out the rest of this sample period (also lets the servo settle)
+        wait = time.ticks_diff(deadline, time.ticks_us())
+        if wait > 0:
+            time.sleep_us(wait)
+            deadline = time.ticks_add(deadline, period_us)
+        else:
+            # Running late: don't try to catch up with a burst of samples
+            deadline = time.ticks_add(time.ticks_us(), period_us)
+    writer.flush()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,152 @@
+# sim_machine.py -- stand-in for MicroPython's `machine` and `time` modules
+# so main.py can run on a PC. main.py falls back to this module when
+# `machine` can't be imported.
+#
+# Time is virtual: sleeps advance the clock instead of blocking, so a run of
+# thousands of samples finishes instantly. Set RADAR_SIM_REALTIME=1 to sleep
+# for real, and RADAR_SIM_UART to a file or pty path to receive UART output
+# (e.g. to feed radar_gui.py from the simulated board).
+import os
+import random
+import time as _time
+
+REALTIME = os.environ.get("RADAR_SIM_REALTIME") == "1"
+
+# Reflectors in the simulated room as (bearing deg, distance cm, half-width deg)
+SCENE = [(30, 80, 6), (75, 150, 4), (120, 60, 8), (160, 200, 5)]
+BACK_WALL_CM = 350  # Returned when no reflector is in the beam
+MISS_RATE = 0.05  # Chance that a ping gets no echo at all
+NOISE_CM = 1.5
+
+_servos = []
+
+
+# Virtual microsecond clock with the MicroPython utime API
+class _Clock:
+    TICKS_PERIOD = 1 << 30
+
+    def __init__(self):
+        self.now_us = 0
+
+    def advance(self, us):
+        self.now_us += max(int(us), 0)
+        if REALTIME:
+            _time.sleep(us / 1000000)
+
+    def ticks_us(self):
+        return self.now_us % self.TICKS_PERIOD
+
+    def ticks_ms(self):
+        return (self.now_us // 1000) % self.TICKS_PERIOD
+
+    def ticks_add(self, ticks, delta):
+        return (ticks + delta) % self.TICKS_PERIOD
+
+    def ticks_diff(self, a, b):
+        half = self.TICKS_PERIOD // 2
+        return ((a - b + half) % self.TICKS_PERIOD) - half
+
+    def sleep_us(self, us):
+        self.advance(us)
+
+    def sleep_ms(self, ms):
+        self.advance(ms * 1000)
+
+    def sleep(self, s):
+        self.advance(s * 1000000)
+
+    def time(self):
+        return self.now_us // 1000000
+
+
+utime = _Clock()
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+
+    def __init__(self, id, mode=IN):
+        self.id = id
+        self.mode = mode
+        self._value = 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    def low(self):
+        self._value = 0
+
+    def high(self):
+        self._value = 1
+
+    on = high
+    off = low
+
+
+class PWM:
+    def __init__(self, pin):
+        self.pin = pin
+        self._freq = 50
+        self._duty = 0
+        _servos.append(self)
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+
+    # Bearing the attached servo is pointing at
+    def angle(self):
+        pulse_us = self._duty * 20000 / 65535
+        return min(max((pulse_us - 500) * 180 / 2000, 0), 180)
+
+
+class UART:
+    def __init__(self, id, baudrate=9600, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.written = bytearray()
+        path = os.environ.get("RADAR_SIM_UART")
+        self._out = open(path, "wb", buffering=0) if path else None
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        data = bytes(data)
+        if self._out is not None:
+            self._out.write(data)
+        else:
+            self.written += data
+        return len(data)
+
+
+# Distance the simulated HC-SR04 sees at the current servo bearing
+def _echo_distance():
+    angle = _servos[0].angle() if _servos else 90
+    distance = BACK_WALL_CM
+    for bearing, range_cm, half_width in SCENE:
+        if abs(angle - bearing) <= half_width:
+            distance = min(distance, range_cm)
+    return distance + random.gauss(0, NOISE_CM)
+
+
+# Time the simulated echo pulse; like the real time_pulse_us this returns
+# -1 when the wait for the pulse times out
+def time_pulse_us(pin, pulse_level, timeout_us=1000000):
+    if random.random() < MISS_RATE:
+        utime.advance(timeout_us)
+        return -1
+    duration = int(max(_echo_distance(), 2) * 2 / 0.0343)
+    if duration > timeout_us:
+        utime.advance(timeout_us)
+        return -1
+    utime.advance(duration)
+    return duration
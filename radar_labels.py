@@ -0,0 +1,164 @@
+try:
+    import tkinter
+    import tkinter.font as tkfont
+except ImportError:
+    tkinter = None
+
+LABEL_HEIGHT = 16
+LABEL_PAD = 10  # Horizontal padding around the name
+LABEL_GAP = 15  # Distance from a target to the centre of a label above or below it
+SIDE_GAP = 8  # Distance from a target to the near edge of a label beside it
+GLYPH_MARGIN = 6  # Labels keep this far from other targets' glyphs
+POSITION_CELL = 8  # Layout is redone only when a target moves to another cell this size
+OCCUPY_CELL = 64  # Bucket size of the placed-label grid
+CHAR_WIDTH = 7  # Width estimate per character when there is no Tk font to measure
+METRICS_CACHE_SIZE = 4096
+
+
+# Pixel widths of label strings, measured once per string with the canvas
+# font. Without a real Tk canvas (e.g. the benchmark's null canvas) widths
+# are estimated from the string length instead.
+class TextMetrics:
+    def __init__(self, canvas=None, font="TkDefaultFont"):
+        self.widths = {}
+        self.font = None
+        if tkinter is not None and isinstance(canvas, tkinter.Misc):
+            try:
+                self.font = tkfont.Font(root=canvas, font=font)
+            except (RuntimeError, tkinter.TclError):
+                self.font = None
+
+    def width(self, text):
+        width = self.widths.get(text)
+        if width is None:
+            if len(self.widths) >= METRICS_CACHE_SIZE:
+                self.widths.clear()
+            width = self.font.measure(text) if self.font is not None else len(text) * CHAR_WIDTH
+            self.widths[text] = width
+        return width
+
+
+# Which side of a target its label prefers, so labels don't run off the
+# radar edge
+def preferred_side(angle):
+    if 45 <= angle <= 135:  # Top half of radar
+        return "top"
+    elif angle < 45:  # Right side
+        return "right"
+    else:  # Left side
+        return "left"
+
+
+def side_offset(side, width):
+    if side == "top":
+        return 0, -LABEL_GAP
+    if side == "bottom":
+        return 0, LABEL_GAP
+    if side == "right":
+        return SIDE_GAP + width / 2, 0
+    return -(SIDE_GAP + width / 2), 0
+
+
+# Greedy label placement. Each visible target tries its previous spot, then
+# its preferred side, then the other sides, and takes the first one that
+# overlaps neither an already placed label nor another target's glyph;
+# targets with no free spot get no label. Glyphs and placed labels are
+# bucketed in a coarse grid, so a pass costs about the same per label
+# however many targets there are. The counts involved are small (labels are
+# dropped past the renderer's LABEL_LIMIT), so plain Python containers beat
+# NumPy calls here.
+#
+# The result is a dict of track index -> (dx, dy, width), the label centre
+# relative to its target. It is reused unchanged while every labelled target
+# stays in the same POSITION_CELL cell and keeps its name, so most frames
+# skip the pass entirely.
+class LabelLayout:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.key = None
+        self.offsets = {}
+        self.passes = 0
+
+    def update(self, xs, ys, angles, names, shown, locked_index):
+        cell = POSITION_CELL
+        key = [(i, int(xs[i] // cell), int(ys[i] // cell), names[i]) for i in shown]
+        key.append(locked_index)
+        if key == self.key:
+            return self.offsets
+        self.key = key
+        self.passes += 1
+
+        metrics = self.metrics
+        c = OCCUPY_CELL
+        glyphs = {}
+        for i in shown:
+            glyphs.setdefault((int(xs[i] // c), int(ys[i] // c)), []).append((i, xs[i], ys[i]))
+        occupied = {}
+        previous = self.offsets
+        offsets = {}
+        half_height = LABEL_HEIGHT / 2
+        margin = GLYPH_MARGIN
+        for i in shown:
+            x = xs[i]
+            y = ys[i]
+            if i == locked_index:
+                # The locked target's label has a fixed spot above it
+                width = max(metrics.width(names[i]) + LABEL_PAD, 120)
+                self._occupy(occupied, x - width / 2, y - 25, x + width / 2, y - 10)
+                continue
+            width = metrics.width(names[i]) + LABEL_PAD
+            half_width = width / 2
+            for dx, dy in self._candidates(angles[i], width, previous.get(i)):
+                left = x + dx - half_width
+                top = y + dy - half_height
+                right = left + width
+                bottom = top + LABEL_HEIGHT
+                if self._collides(occupied, left, top, right, bottom):
+                    continue
+                if self._covers_glyph(glyphs, i, left - margin, top - margin,
+                                      right + margin, bottom + margin):
+                    continue
+                self._occupy(occupied, left, top, right, bottom)
+                offsets[i] = (dx, dy, width)
+                break
+        self.offsets = offsets
+        return offsets
+
+    def _candidates(self, angle, width, previous):
+        if previous is not None and previous[2] == width:
+            yield previous[0], previous[1]
+        first = preferred_side(angle)
+        yield side_offset(first, width)
+        for side in ("top", "right", "left", "bottom"):
+            if side != first:
+                yield side_offset(side, width)
+
+    def _cells(self, left, top, right, bottom):
+        c = OCCUPY_CELL
+        for col in range(int(left // c), int(right // c) + 1):
+            for row in range(int(top // c), int(bottom // c) + 1):
+                yield col, row
+
+    def _collides(self, occupied, left, top, right, bottom):
+        for cell in self._cells(left, top, right, bottom):
+            for l, t, r, b in occupied.get(cell, ()):
+                if left < r and l < right and top < b and t < bottom:
+                    return True
+        return False
+
+    # Whether the box contains any glyph other than target `own`'s
+    def _covers_glyph(self, glyphs, own, left, top, right, bottom):
+        for cell in self._cells(left, top, right, bottom):
+            for i, x, y in glyphs.get(cell, ()):
+                if i != own and left <= x <= right and top <= y <= bottom:
+                    return True
+        return False
+
+    def _occupy(self, occupied, left, top, right, bottom):
+        rect = (left, top, right, bottom)
+        for cell in self._cells(left, top, right, bottom):
+            occupied.setdefault(cell, []).append(rect)
+
+    def reset(self):
+        self.key = None
+        self.offsets = {}
@@ -0,0 +1,167 @@
+import csv
+import os
+import time
+
+REPORT_INTERVAL = 1.0  # Seconds per reporting window
+PHASES = ("serial", "simulation", "targets", "info", "lock")  # Parts of a frame that are timed
+
+
+class _PhaseTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+# Frame loop instrumentation. Phases are timed with
+#
+#   with metrics.phase("simulation"):
+#       ...
+#
+# and events are counted with count() (or set_total() for counters kept
+# elsewhere, like the serial reader's byte count). Every REPORT_INTERVAL
+# seconds the window is rolled into `report`, a flat dict of per-phase mean
+# and max milliseconds, frame rate, and each counter's total, rate per
+# second and rate per frame, ready for the overlay or a MetricsWriter.
+class Metrics:
+    def __init__(self, interval=REPORT_INTERVAL, clock=time.perf_counter):
+        self.interval = interval
+        self.clock = clock
+        self.timers = {}
+        self.times = {name: [0.0, 0, 0.0] for name in PHASES}  # Seconds, calls, max this window
+        self.counters = {}
+        self.window_counters = {}  # Counter values when the window started
+        self.frames = 0
+        self.window_start = clock()
+        self.report = {}
+
+    def phase(self, name):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def add_time(self, name, seconds):
+        entry = self.times.get(name)
+        if entry is None:
+            entry = self.times[name] = [0.0, 0, 0.0]
+        entry[0] += seconds
+        entry[1] += 1
+        if seconds > entry[2]:
+            entry[2] = seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_total(self, name, value):
+        self.counters[name] = value
+
+    # Mark one rendered frame
+    def frame(self):
+        self.frames += 1
+
+    # Roll the window if it is over. Returns True when a new report is ready.
+    def tick(self, now=None):
+        if now is None:
+            now = self.clock()
+        elapsed = now - self.window_start
+        if elapsed < self.interval:
+            return False
+        frames = self.frames
+        report = {"fps": frames / elapsed}
+        for name, entry in self.times.items():
+            total, calls, peak = entry
+            report[f"{name}_ms"] = total / calls * 1e3 if calls else 0.0
+            report[f"{name}_max_ms"] = peak * 1e3
+            entry[0] = 0.0
+            entry[1] = 0
+            entry[2] = 0.0
+        for name, value in self.counters.items():
+            delta = value - self.window_counters.get(name, 0)
+            report[f"{name}_total"] = value
+            report[f"{name}_per_s"] = delta / elapsed
+            report[f"{name}_per_frame"] = delta / frames if frames else 0.0
+        self.window_counters = dict(self.counters)
+        self.frames = 0
+        self.window_start = now
+        self.report = report
+        return True
+
+
+# Count the canvas items created and deleted through `canvas`, by wrapping
+# its create_* and delete methods in place (the canvas stays a real Canvas,
+# so isinstance checks and font lookups still work)
+def instrument_canvas(canvas, metrics):
+    def counting(method, counter):
+        def call(*args, **kwargs):
+            metrics.count(counter, max(len(args), 1) if counter == "items_deleted" else 1)
+            return method(*args, **kwargs)
+        return call
+
+    for kind in ("line", "oval", "polygon", "rectangle", "text", "image"):
+        name = "create_" + kind
+        method = getattr(canvas, name, None)
+        if method is not None:
+            setattr(canvas, name, counting(method, "items_created"))
+    canvas.delete = counting(canvas.delete, "items_deleted")
+    return canvas
+
+
+# Periodic dump of Metrics reports. A path ending in .prom is rewritten
+# each time in the Prometheus text format (for node_exporter's textfile
+# collector); anything else gets one CSV row appended per report.
+class MetricsWriter:
+    def __init__(self, path):
+        self.path = path
+        self.prometheus = path.endswith(".prom")
+        self.columns = None
+        self.file = None
+        self.writer = None
+
+    def write(self, report, wall_time=None):
+        if wall_time is None:
+            wall_time = time.time()
+        if self.prometheus:
+            self._write_prometheus(report, wall_time)
+        else:
+            self._write_csv(report, wall_time)
+
+    def _write_prometheus(self, report, wall_time):
+        lines = []
+        for name, value in sorted(report.items()):
+            lines.append(f"# TYPE radar_{name} gauge")
+            lines.append(f"radar_{name} {value:.6g}")
+        lines.append("# TYPE radar_report_time_seconds gauge")
+        lines.append(f"radar_report_time_seconds {wall_time:.3f}")
+        # Write then rename so a scraper never sees half a file
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp, self.path)
+
+    def _write_csv(self, report, wall_time):
+        if self.file is None:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self.file = open(self.path, "a", newline="")
+            self.writer = csv.writer(self.file)
+            # Counters that first show up later are left out of the columns
+            self.columns = sorted(report)
+            if new:
+                self.writer.writerow(["time"] + self.columns)
+        self.writer.writerow([f"{wall_time:.3f}"] + [f"{report.get(name, 0):.6g}" for name in self.columns])
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,83 @@
+import numpy as np
+
+ANGLE_STEPS = 3600  # Lookup table resolution (0.1 degree)
+DECAY_PER_SECOND = 0.15  # Fraction of brightness left after one second
+SPLAT = 0.8  # Brightness one echo adds to its pixel
+SWEEP_DPS = 90.0  # Speed of the simulated sweep (degrees per second)
+
+# Green phosphor palette: intensity 0-255 -> RGB
+_ramp = np.linspace(0.0, 1.0, 256)
+PALETTE = np.stack([
+    (_ramp ** 3 * 120),  # A little red and blue near full brightness reads as a hot core
+    (_ramp ** 0.7 * 255),
+    (_ramp ** 3 * 80),
+], axis=1).astype(np.uint8)
+
+_ANGLES = np.arange(ANGLE_STEPS) * (2 * np.pi / ANGLE_STEPS)
+COS_TABLE = np.cos(_ANGLES)
+SIN_TABLE = np.sin(_ANGLES)
+
+
+# Raster plan-position indicator. Echoes are added into a float intensity
+# buffer covering the radar circle, the whole buffer is multiplied down
+# every frame for the phosphor afterglow, and each frame becomes one PPM
+# image for a single Tk PhotoImage. The cost per frame is a few whole-buffer
+# NumPy operations, so it doesn't depend on how many echoes there are.
+class PPIRaster:
+    def __init__(self, radius, decay_per_second=DECAY_PER_SECOND):
+        self.radius = int(radius)
+        self.size = 2 * self.radius + 1
+        self.decay_per_second = decay_per_second
+        self.buffer = np.zeros(self.size * self.size, dtype=np.float32)
+        y, x = np.mgrid[:self.size, :self.size] - self.radius
+        self.outside = (x * x + y * y > self.radius * self.radius).ravel()
+        self.header = f"P6 {self.size} {self.size} 255 ".encode()
+        self.sweep_angle = 0.0
+        self.sweep_direction = 1
+        self.echoes = 0
+
+    # Add echoes at (angle in degrees, distance) in radar units
+    def add_returns(self, angles, distances, intensity=SPLAT):
+        if not len(angles):
+            return
+        steps = np.rint(np.asarray(angles) * (ANGLE_STEPS / 360.0)).astype(np.intp) % ANGLE_STEPS
+        distances = np.asarray(distances, dtype=float)
+        keep = (distances >= 0) & (distances <= self.radius)
+        steps = steps[keep]
+        distances = distances[keep]
+        r = self.radius
+        xs = np.rint(r + distances * COS_TABLE[steps]).astype(np.intp)
+        ys = np.rint(r + distances * SIN_TABLE[steps]).astype(np.intp)
+        flat = ys * self.size + xs
+        self.buffer += intensity * np.bincount(flat, minlength=self.buffer.size).astype(np.float32)
+        self.echoes += len(flat)
+
+    # Move the simulated sweep over `elapsed` seconds, bouncing over 0-180
+    # degrees like the servo. Returns the (low, high) wedge it covered.
+    def advance_sweep(self, elapsed):
+        start = self.sweep_angle
+        angle = start + self.sweep_direction * SWEEP_DPS * elapsed
+        if angle >= 180 or angle <= 0:
+            self.sweep_direction = -self.sweep_direction
+            angle = min(max(angle, 0.0), 180.0)
+        self.sweep_angle = angle
+        return min(start, angle), max(start, angle)
+
+    # Paint the tracks the sweep passed over in the last `elapsed` seconds
+    def sweep_tracks(self, angles, distances, visible, elapsed):
+        low, high = self.advance_sweep(elapsed)
+        hit = visible & (angles >= low) & (angles <= high)
+        self.add_returns(angles[hit], distances[hit], intensity=1.0)
+
+    def decay(self, elapsed):
+        self.buffer *= np.float32(self.decay_per_second ** elapsed)
+
+    # The buffer as binary PPM data
+    def ppm(self):
+        np.clip(self.buffer, 0.0, 1.0, out=self.buffer)
+        self.buffer[self.outside] = 0.0
+        levels = (self.buffer * 255).astype(np.uint8)
+        return self.header + PALETTE[levels].tobytes()
+
+    def clear(self):
+        self.buffer[:] = 0.0
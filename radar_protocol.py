@@ -0,0 +1,161 @@
+import binascii
+import struct
+import numpy as np
+
+# Binary framing shared with radar_integrated/main.py.
+#
+# Each frame carries a batch of samples:
+#   version u8, count u8, count * sample, crc16 u16
+# where a sample is angle (0.01 degree units) u16, distance (mm) u16,
+# device tick (us) u32 and sequence number u16, all little-endian. The CRC is
+# CRC-16/CCITT (poly 0x1021, init 0xFFFF) over everything before it. Frames
+# are COBS encoded and terminated with a zero byte so the reader can resync
+# after line noise by skipping to the next zero.
+FRAME_VERSION = 1
+HEADER_FORMAT = "<BB"
+SAMPLE_FORMAT = "<HHIH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+SAMPLE_SIZE = struct.calcsize(SAMPLE_FORMAT)
+CRC_SIZE = 2
+MAX_SAMPLES = 24  # Keeps a whole frame inside one COBS block
+# Longest encoded frame: the largest payload, its COBS code byte and the terminator
+MAX_FRAME_SIZE = HEADER_SIZE + MAX_SAMPLES * SAMPLE_SIZE + CRC_SIZE + 2
+SAMPLE_DTYPE = np.dtype([("angle", "<u2"), ("distance", "<u2"),
+                         ("tick", "<u4"), ("seq", "<u2")])
+
+
+def crc16(data, crc=0xFFFF):
+    return binascii.crc_hqx(data, crc)
+
+
+def cobs_encode(data):
+    out = bytearray()
+    block = bytearray()
+    for byte in data:
+        if byte == 0:
+            out.append(len(block) + 1)
+            out += block
+            block = bytearray()
+        else:
+            block.append(byte)
+            if len(block) == 254:
+                out.append(255)
+                out += block
+                block = bytearray()
+    out.append(len(block) + 1)
+    out += block
+    return bytes(out)
+
+
+# Decode one COBS block (without its zero terminator). Works a run at a
+# time rather than a byte at a time. Returns None if the block is corrupt.
+def cobs_decode(data):
+    data = memoryview(data)
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0 or i + code > n:
+            return None
+        out += data[i + 1:i + code]
+        i += code
+        if code < 255 and i < n:
+            out.append(0)
+    return out
+
+
+# Build one encoded frame (including the trailing zero) from sample arrays
+def encode_frame(angles, distances, ticks, seqs):
+    count = len(angles)
+    payload = bytearray(struct.pack(HEADER_FORMAT, FRAME_VERSION, count))
+    for sample in zip(angles, distances, ticks, seqs):
+        payload += struct.pack(SAMPLE_FORMAT, min(int(round(sample[0] * 100)), 0xFFFF),
+                               min(int(round(sample[1] * 10)), 0xFFFF),
+                               int(sample[2]) & 0xFFFFFFFF, int(sample[3]) & 0xFFFF)
+    payload += struct.pack("<H", crc16(payload))
+    return cobs_encode(payload) + b"\x00"
+
+
+# Check and unwrap one COBS block (without its zero terminator). Returns a
+# view of the frame's sample bytes, or None if it isn't a valid frame.
+def decode_frame(block):
+    if len(block) == 0:
+        return None
+    frame = cobs_decode(block)
+    if frame is None or len(frame) < HEADER_SIZE + CRC_SIZE:
+        return None
+    version, count = struct.unpack_from(HEADER_FORMAT, frame)
+    body = memoryview(frame)[:-CRC_SIZE]
+    expected = struct.unpack_from("<H", frame, len(frame) - CRC_SIZE)[0]
+    if (version != FRAME_VERSION or len(body) != HEADER_SIZE + count * SAMPLE_SIZE
+            or crc16(body) != expected):
+        return None
+    return body[HEADER_SIZE:]
+
+
+# Incremental decoder for the framed binary stream. feed() returns angles
+# (degrees), distances (cm) and device ticks (us) for every complete frame
+# received so far. Corrupt frames are counted in `errors` and gaps in the
+# sequence numbers in `dropped`.
+class FrameDecoder:
+    def __init__(self):
+        self.pending = bytearray()
+        self.errors = 0
+        self.dropped = 0
+        self.frames = 0
+        self.last_seq = None
+
+    def feed(self, data):
+        pending = self.pending
+        pending += data
+        end = pending.rfind(b"\x00")
+        if end < 0:
+            self._limit_pending()
+            return np.empty(0), np.empty(0), np.empty(0)
+        view = memoryview(pending)
+        payloads = []
+        start = 0
+        while start < end:
+            stop = pending.find(b"\x00", start, end + 1)
+            payload = self._unpack(view[start:stop])
+            if payload is not None:
+                payloads.append(payload)
+            start = stop + 1
+        view.release()
+        del pending[:end + 1]
+        self._limit_pending()
+        if not payloads:
+            return np.empty(0), np.empty(0), np.empty(0)
+        samples = np.frombuffer(b"".join(payloads), dtype=SAMPLE_DTYPE)
+        self._check_sequence(samples["seq"])
+        return (samples["angle"] / 100.0, samples["distance"] / 10.0,
+                samples["tick"].astype(float))
+
+    # Bytes that have gone longer than any frame without a terminator can't
+    # be a frame; drop them (one error) and resync on the next zero
+    def _limit_pending(self):
+        if len(self.pending) > MAX_FRAME_SIZE:
+            self.errors += 1
+            self.pending.clear()
+
+    # Validate one frame and return a view of its sample bytes
+    def _unpack(self, block):
+        if len(block) == 0:
+            return None
+        samples = decode_frame(block)
+        if samples is None:
+            self.errors += 1
+            return None
+        self.frames += 1
+        return samples
+
+    def _check_sequence(self, seqs):
+        if not len(seqs):
+            return
+        seqs = seqs.astype(np.int64)
+        gaps = (np.diff(seqs) - 1) & 0xFFFF
+        if self.last_seq is not None:
+            self.dropped += int((seqs[0] - self.last_seq - 1) & 0xFFFF)
+        self.dropped += int(gaps.sum())
+        self.last_seq = int(seqs[-1])
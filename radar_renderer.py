@@ -0,0 +1,358 @@
+import numpy as np
+from radar_tracks import TYPE_AIRCRAFT, TYPE_SHIP, TYPE_VEHICLE
+from radar_labels import TextMetrics, LabelLayout, LABEL_HEIGHT, LABEL_PAD
+
+# Glyph shapes as (canvas item kind, point offsets from the target, fill).
+# Locked targets get a slightly larger glyph with a white outline.
+GLYPHS = {
+    TYPE_AIRCRAFT: ("polygon", (0, -5, -5, 3, 5, 3), "red"),  # Triangle pointing up
+    TYPE_SHIP: ("polygon", (0, -5, 5, 0, 0, 5, -5, 0), "blue"),  # Diamond shape
+    TYPE_VEHICLE: ("rectangle", (-4, -4, 4, 4), "green"),  # Square
+}
+LOCKED_GLYPHS = {
+    TYPE_AIRCRAFT: ("polygon", (0, -7, -6, 5, 6, 5), "red"),
+    TYPE_SHIP: ("polygon", (0, -7, 7, 0, 0, 7, -7, 0), "blue"),
+    TYPE_VEHICLE: ("rectangle", (-5, -5, 5, 5), "green"),
+}
+UNKNOWN_GLYPH = ("oval", (-5, -5, 5, 5), "orange")  # Circle
+
+LABEL_LIMIT = 300  # Above this many visible targets, no labels are drawn
+DOT_LIMIT = 3000  # Above this many, targets are drawn as plain dots
+LOD_HYSTERESIS = 0.8  # Switch back once the count drops below this fraction of a limit
+DOT_RADIUS = 1.5
+TRAIL_LIMIT = 300  # Above this many visible targets, no trails are drawn
+TRAIL_COLOR = "#2e6b2e"
+
+
+# Canvas items owned by one track. `key` is the (type, locked, dot) triple
+# the items were built for; anything else about the track only moves,
+# retexts or hides them. `label` is the placed (dx, dy, width) of the name
+# label, or None while it is hidden.
+class _Slot:
+    __slots__ = ("key", "name", "items", "offsets", "label_items", "pos", "label",
+                 "shown", "label_shown")
+
+    def __init__(self):
+        self.key = None
+        self.name = None
+        self.items = []
+        self.offsets = []
+        self.label_items = []
+        self.pos = None
+        self.label = None
+        self.shown = True
+        self.label_shown = True
+
+
+# Retained-mode target renderer. Each track keeps a pool of canvas item IDs
+# which are moved with coords() every frame, hidden when the track
+# disappears and only rebuilt when its type, lock or detail level changes.
+# Name labels are placed by a LabelLayout so they don't overlap; past
+# LABEL_LIMIT visible targets labels are dropped, and past DOT_LIMIT
+# targets are drawn as plain dots.
+class TargetRenderer:
+    def __init__(self, canvas, tag="target"):
+        self.canvas = canvas
+        self.tag = tag
+        self.slots = []
+        self.metrics = TextMetrics(canvas)
+        self.layout = LabelLayout(self.metrics)
+        self.labels = True
+        self.dots = False
+
+    def _offset(self, offsets, x, y):
+        return [v + (y if k % 2 else x) for k, v in enumerate(offsets)]
+
+    def _delete(self, slot):
+        for item in slot.items + slot.label_items:
+            self.canvas.delete(item)
+
+    def _build(self, slot, type_code, locked, dot, name):
+        canvas = self.canvas
+        tag = self.tag
+        self._delete(slot)
+        items = []
+        offsets = []
+        label_items = []
+        if dot:
+            fill = GLYPHS.get(type_code, UNKNOWN_GLYPH)[2]
+            shape = (-DOT_RADIUS, -DOT_RADIUS, DOT_RADIUS, DOT_RADIUS)
+            items.append(canvas.create_oval(*shape, fill=fill, outline="", tags=tag))
+            offsets.append(shape)
+        else:
+            if locked:
+                # Highlight the locked target with yellow outline
+                items.append(canvas.create_oval(0, 0, 0, 0, outline="yellow", width=2, tags=tag))
+                offsets.append((-10, -10, 10, 10))
+                kind, shape, fill = LOCKED_GLYPHS.get(type_code, UNKNOWN_GLYPH)
+                options = {"outline": "white"} if type_code in LOCKED_GLYPHS else {}
+            else:
+                kind, shape, fill = GLYPHS.get(type_code, UNKNOWN_GLYPH)
+                options = {}
+            create = getattr(canvas, "create_" + kind)
+            items.append(create(*self._offset(shape, 0, 0), fill=fill, tags=tag, **options))
+            offsets.append(shape)
+            if locked:
+                # Show target name near the locked target with background for better visibility
+                label_items.append(canvas.create_rectangle(0, 0, 0, 0, fill="black", outline="yellow", tags=tag))
+                label_items.append(canvas.create_text(0, 0, text=name, fill="yellow", tags=tag))
+            else:
+                # Show name next to the target on a plain background
+                label_items.append(canvas.create_rectangle(0, 0, 0, 0, fill="black", outline="", tags=tag))
+                label_items.append(canvas.create_text(0, 0, text=name, fill="cyan", tags=tag))
+        slot.key = (type_code, locked, dot)
+        slot.name = name
+        slot.items = items
+        slot.offsets = offsets
+        slot.label_items = label_items
+        slot.pos = None
+        slot.label = None
+        slot.shown = True
+        slot.label_shown = True
+
+    def _place(self, slot, x, y):
+        coords = self.canvas.coords
+        for item, offsets in zip(slot.items, slot.offsets):
+            coords(item, *self._offset(offsets, x, y))
+        slot.pos = (x, y)
+        slot.label = None  # Forces the label to follow
+
+    def _place_label(self, slot, label):
+        x, y = slot.pos
+        coords = self.canvas.coords
+        rect, text = slot.label_items
+        if slot.key[1]:
+            width = max(self.metrics.width(slot.name) + LABEL_PAD, 120)
+            coords(rect, x - width / 2, y - 25, x + width / 2, y - 10)
+            coords(text, x, y - 17)
+        else:
+            dx, dy, width = label
+            text_x = x + dx
+            text_y = y + dy
+            coords(rect, text_x - width / 2, text_y - LABEL_HEIGHT / 2,
+                   text_x + width / 2, text_y + LABEL_HEIGHT / 2)
+            coords(text, text_x, text_y)
+        slot.label = label
+
+    def _set_state(self, items, shown):
+        state = "normal" if shown else "hidden"
+        for item in items:
+            self.canvas.itemconfigure(item, state=state)
+
+    def _set_shown(self, slot, shown, label_shown):
+        if slot.shown != shown:
+            self._set_state(slot.items, shown)
+            slot.shown = shown
+        label_shown = label_shown and shown
+        if slot.label_items and slot.label_shown != label_shown:
+            self._set_state(slot.label_items, label_shown)
+            slot.label_shown = label_shown
+
+    # Pick the level of detail for `count` visible targets, with some
+    # hysteresis so a count hovering at a limit doesn't rebuild every frame
+    def _update_detail(self, count):
+        if self.labels and count > LABEL_LIMIT:
+            self.labels = False
+        elif not self.labels and count < LABEL_LIMIT * LOD_HYSTERESIS:
+            self.labels = True
+        if not self.dots and count > DOT_LIMIT:
+            self.dots = True
+        elif self.dots and count < DOT_LIMIT * LOD_HYSTERESIS:
+            self.dots = False
+
+    # Sync the canvas with the track table. xs, ys and angles are plain
+    # lists of every track's screen position and bearing. `visible`, if
+    # given, replaces the tracks' own visibility mask (e.g. to draw only the
+    # locked track over a raster display).
+    def draw(self, tracks, xs, ys, angles, locked_index, visible=None):
+        slots = self.slots
+        count = len(tracks)
+        # Drop the items of tracks that no longer exist
+        while len(slots) > count:
+            self._delete(slots.pop())
+        while len(slots) < count:
+            slots.append(_Slot())
+
+        if visible is None:
+            visible = tracks.visible
+        shown = np.flatnonzero(visible).tolist()
+        visible = visible.tolist()
+        type_codes = tracks.type_code.tolist()
+        names = tracks.names
+        self._update_detail(len(shown))
+        dots = self.dots
+        if self.labels:
+            labels = self.layout.update(xs, ys, angles, names, shown, locked_index)
+        else:
+            labels = {}
+        for i in range(count):
+            slot = slots[i]
+            if not visible[i]:
+                # Hide instead of destroying so reappearing costs nothing
+                if slot.items:
+                    self._set_shown(slot, False, False)
+                continue
+            locked = i == locked_index
+            key = (type_codes[i], locked, dots and not locked)
+            if slot.key != key:
+                self._build(slot, key[0], locked, key[2], names[i])
+            elif slot.name != names[i]:
+                if slot.label_items:
+                    self.canvas.itemconfigure(slot.label_items[1], text=names[i])
+                slot.name = names[i]
+                slot.label = None
+            label = labels.get(i) if not locked else (0, 0, 0)
+            self._set_shown(slot, True, label is not None)
+            pos = (xs[i], ys[i])
+            if slot.pos != pos:
+                self._place(slot, *pos)
+            if label is not None and slot.label != label and slot.label_items:
+                self._place_label(slot, label)
+
+    def clear(self):
+        for slot in self.slots:
+            self._delete(slot)
+        self.slots = []
+        self.layout.reset()
+
+
+# Fixed set of text lines that are created once and then only
+# re-configured when their text, colour or position changes.
+class TextPanel:
+    def __init__(self, canvas, tag="info"):
+        self.canvas = canvas
+        self.tag = tag
+        self.lines = []  # [item, (x, y), text, fill, shown]
+        self.used = 0
+
+    # Show `text` as the next line of the panel
+    def text(self, x, y, text, fill, anchor="w"):
+        canvas = self.canvas
+        if self.used == len(self.lines):
+            item = canvas.create_text(x, y, text=text, fill=fill, anchor=anchor, tags=self.tag)
+            self.lines.append([item, (x, y), text, fill, True])
+        else:
+            line = self.lines[self.used]
+            item = line[0]
+            if line[1] != (x, y):
+                canvas.coords(item, x, y)
+                line[1] = (x, y)
+            if line[2] != text or line[3] != fill:
+                canvas.itemconfigure(item, text=text, fill=fill)
+                line[2] = text
+                line[3] = fill
+            if not line[4]:
+                canvas.itemconfigure(item, state="normal")
+                line[4] = True
+        self.used += 1
+
+    # Start a new frame of lines
+    def begin(self):
+        self.used = 0
+
+    # Hide the lines that weren't used this frame
+    def end(self):
+        for line in self.lines[self.used:]:
+            if line[4]:
+                self.canvas.itemconfigure(line[0], state="hidden")
+                line[4] = False
+
+
+# A single canvas line that is moved or hidden rather than recreated
+class PooledLine:
+    def __init__(self, canvas, tag, **options):
+        self.canvas = canvas
+        self.item = canvas.create_line(0, 0, 0, 0, state="hidden", tags=tag, **options)
+        self.coords = None
+        self.shown = False
+
+    def show(self, *coords):
+        if coords != self.coords:
+            self.canvas.coords(self.item, *coords)
+            self.coords = coords
+        if not self.shown:
+            self.canvas.itemconfigure(self.item, state="normal")
+            self.shown = True
+
+    def hide(self):
+        if self.shown:
+            self.canvas.itemconfigure(self.item, state="hidden")
+            self.shown = False
+
+
+# Decimated history trails, one pooled canvas line per track ID. Lines are
+# only re-coordinated when the TrackHistory has recorded something new (a
+# few times a second) or a track's visibility changed, and each holds at
+# most TRAIL_POINTS points, so trails cost little however long the history
+# is. Past TRAIL_LIMIT visible targets trails are hidden altogether.
+class TrailRenderer:
+    def __init__(self, canvas, tag="trail", center=(0, 0)):
+        self.canvas = canvas
+        self.tag = tag
+        self.center = center
+        self.lines = {}  # Track ID -> [item, coords, shown]
+        self.enabled = True
+        self.key = None  # (history version, shown IDs) of the last update
+
+    def _hide(self, line):
+        if line[2]:
+            self.canvas.itemconfigure(line[0], state="hidden")
+            line[2] = False
+
+    # Sync the trail lines with `history` for the tracks of `ids` that are
+    # set in `visible`
+    def draw(self, history, ids, visible):
+        shown = ids[visible]
+        count = len(shown)
+        if self.enabled and count > TRAIL_LIMIT:
+            self.enabled = False
+        elif not self.enabled and count < TRAIL_LIMIT * LOD_HYSTERESIS:
+            self.enabled = True
+        if not self.enabled:
+            shown = shown[:0]
+        shown_ids = shown.tolist()
+        key = (history.version, tuple(shown_ids))
+        if key == self.key:
+            return
+        self.key = key
+
+        canvas = self.canvas
+        lines = self.lines
+        current = set(ids.tolist())
+        for track_id in [track_id for track_id in lines if track_id not in current]:
+            canvas.delete(lines.pop(track_id)[0])
+        for track_id in set(lines).difference(shown_ids):
+            self._hide(lines[track_id])
+        if not shown_ids:
+            return
+
+        xs, ys, keep = history.trails(shown_ids)
+        cx, cy = self.center
+        for k, track_id in enumerate(shown_ids):
+            row = keep[k]
+            line = lines.get(track_id)
+            if row.sum() < 2:
+                if line is not None:
+                    self._hide(line)
+                continue
+            points = np.empty(2 * int(row.sum()))
+            points[0::2] = xs[k][row] + cx
+            points[1::2] = ys[k][row] + cy
+            coords = points.tolist()
+            if line is None:
+                item = canvas.create_line(*coords, fill=TRAIL_COLOR, tags=self.tag)
+                # Under the target glyphs, over the background
+                canvas.tag_raise(item, "background")
+                line = lines[track_id] = [item, coords, True]
+            elif line[1] != coords:
+                canvas.coords(line[0], *coords)
+                line[1] = coords
+            if not line[2]:
+                canvas.itemconfigure(line[0], state="normal")
+                line[2] = True
+
+    def clear(self):
+        for line in self.lines.values():
+            self.canvas.delete(line[0])
+        self.lines = {}
+        self.key = None
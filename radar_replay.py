@@ -0,0 +1,246 @@
+# Recording and replay of sensor samples and track states.
+#
+# A log is a short header followed by fixed-size records, so a reader can
+# memory-map the file and view every record as one NumPy array without
+# parsing anything, and seek by timestamp with a binary search.
+#
+#   python radar_replay.py radar.log            # summary plus a fast replay
+#   python radar_gui.py --record radar.log      # record a session
+#   python radar_gui.py --replay radar.log      # play it back in the GUI
+import argparse
+import mmap
+import os
+import time
+import numpy as np
+from radar_engine import RadarEngine
+
+MAGIC = b"RADRLOG1"
+HEADER_SIZE = 16  # Magic plus the record size, padded
+
+# Record kinds
+KIND_SAMPLE = 0  # A raw (angle, distance) sample from the sensor
+KIND_TRACK = 1  # One track's state at the time of a simulation tick
+
+# Record flags
+FLAG_VISIBLE = 1
+FLAG_LOCKED = 2
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),  # Wall clock seconds
+    ("kind", "u1"),
+    ("type_code", "u1"),
+    ("flags", "u1"),
+    ("pad", "u1"),
+    ("track", "<u4"),  # Track ID (0 for samples)
+    ("angle", "<f4"),
+    ("distance", "<f4"),
+    ("name", "S12"),
+])
+
+
+def _header():
+    return MAGIC + RECORD_DTYPE.itemsize.to_bytes(4, "little") + bytes(HEADER_SIZE - len(MAGIC) - 4)
+
+
+# Appends records to a log file. Records are built as NumPy arrays and
+# written with a single write() per call. Readers binary-search the log by
+# time, so record times never go backwards: a sample that arrives after a
+# later track state was written (it sat in the sensor hub's hold-back, or
+# came in between a frame's drain and its track record) is logged at the
+# time of the last record instead.
+class LogRecorder:
+    def __init__(self, path):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.last_time = -np.inf
+        if not new and os.path.getsize(path) >= HEADER_SIZE + RECORD_DTYPE.itemsize:
+            with open(path, "rb") as f:
+                f.seek(-RECORD_DTYPE.itemsize, os.SEEK_END)
+                self.last_time = float(np.frombuffer(f.read(), dtype=RECORD_DTYPE)["time"][0])
+        self.file = open(path, "ab")
+        if new:
+            self.file.write(_header())
+        self.records = 0
+
+    def _write(self, records):
+        if not len(records):
+            return
+        times = np.maximum.accumulate(np.maximum(records["time"], self.last_time))
+        records["time"] = times
+        self.last_time = float(times[-1])
+        self.file.write(records.tobytes())
+        self.records += len(records)
+
+    def record_samples(self, times, angles, distances):
+        records = np.zeros(len(angles), dtype=RECORD_DTYPE)
+        records["time"] = times
+        records["kind"] = KIND_SAMPLE
+        records["flags"] = FLAG_VISIBLE
+        records["angle"] = angles
+        records["distance"] = distances
+        self._write(records)
+
+    # Record the state of the tracks in an engine snapshot at time `now`.
+    # Sensor returns shown as tracks are left out; they are logged as samples.
+    def record_tracks(self, snapshot, now):
+        n = snapshot.base_count
+        records = np.zeros(n, dtype=RECORD_DTYPE)
+        records["time"] = now
+        records["kind"] = KIND_TRACK
+        records["type_code"] = snapshot.type_code[:n]
+        records["flags"] = np.where(snapshot.visible[:n], FLAG_VISIBLE, 0)
+        if snapshot.locked_index is not None and snapshot.locked_index < n:
+            records["flags"][snapshot.locked_index] |= FLAG_LOCKED
+        records["track"] = snapshot.track_id[:n]
+        records["angle"] = snapshot.angle[:n]
+        records["distance"] = snapshot.distance[:n]
+        records["name"] = [name.encode()[:12] for name in snapshot.names[:n]]
+        self._write(records)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# Read-only, memory-mapped view of a log. `records` is a structured array
+# backed directly by the file. Seeking relies on the records being in time
+# order, so a log that isn't is rejected.
+class LogReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        header = self.file.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a radar log")
+        record_size = int.from_bytes(header[len(MAGIC):len(MAGIC) + 4], "little")
+        if record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} has {record_size} byte records, expected {RECORD_DTYPE.itemsize}")
+        count = (size - HEADER_SIZE) // record_size
+        if count:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.map, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        else:
+            self.map = None
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        self.times = self.records["time"]
+        if np.any(self.times[1:] < self.times[:-1]):
+            self.close()
+            raise ValueError(f"{path} is not in time order")
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def start_time(self):
+        return float(self.times[0]) if len(self) else 0.0
+
+    @property
+    def end_time(self):
+        return float(self.times[-1]) if len(self) else 0.0
+
+    # Index of the first record at or after time `t`
+    def find(self, t):
+        return int(np.searchsorted(self.times, t, side="left"))
+
+    def close(self):
+        self.records = None
+        self.times = None
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+# Walks a log at a chosen speed. advance(elapsed) moves the replay clock by
+# `elapsed` real seconds times `speed` and returns the records that became
+# due; with speed 0 each call returns the next `batch` records instead, as
+# fast as the caller can take them.
+class Replayer:
+    def __init__(self, reader, speed=1.0, batch=4096):
+        self.reader = reader
+        self.speed = speed
+        self.batch = batch
+        self.position = 0
+        self.time = reader.start_time
+
+    @property
+    def finished(self):
+        return self.position >= len(self.reader)
+
+    # Jump to `t` seconds after the start of the log
+    def seek(self, t):
+        self.time = self.reader.start_time + t
+        self.position = self.reader.find(self.time)
+
+    def advance(self, elapsed):
+        start = self.position
+        if self.speed > 0:
+            self.time += elapsed * self.speed
+            end = int(np.searchsorted(self.reader.times, self.time, side="right"))
+        else:
+            end = min(start + self.batch, len(self.reader))
+            if end > start:
+                self.time = float(self.reader.times[end - 1])
+        end = max(end, start)
+        self.position = end
+        return self.reader.records[start:end]
+
+
+# Split a batch of records into the sensor samples and the last complete set
+# of track states it contains (None if it has no track records)
+def split_records(records):
+    samples = records[records["kind"] == KIND_SAMPLE]
+    tracks = records[records["kind"] == KIND_TRACK]
+    if len(tracks):
+        tracks = tracks[tracks["time"] == tracks["time"][-1]]
+    else:
+        tracks = None
+    return samples, tracks
+
+
+# Push one batch of replayed records into an engine. `now` is the replay
+# clock (the time of the last record by default); the sensor tracks are
+# aged to it so tracks the log stops confirming get deleted.
+def apply_records(engine, records, now=None):
+    samples, tracks = split_records(records)
+    if tracks is not None:
+        locked = np.flatnonzero(tracks["flags"] & FLAG_LOCKED)
+        engine.load_tracks(tracks["angle"], tracks["distance"],
+                           (tracks["flags"] & FLAG_VISIBLE) != 0, tracks["type_code"],
+                           [name.decode() for name in tracks["name"].tolist()],
+                           int(locked[0]) if len(locked) else None, float(tracks["time"][0]),
+                           ids=tracks["track"].astype(np.int64))
+    if len(samples):
+        engine.add_detections(samples["angle"].astype(float), samples["distance"].astype(float), samples["time"])
+    if now is None and len(records):
+        now = float(records["time"][-1])
+    if now is not None:
+        engine.coast_tracks(now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a radar log and time a replay of it")
+    parser.add_argument("log", help="log file written with --record")
+    parser.add_argument("--start", type=float, default=0.0, help="seconds into the log to start from")
+    args = parser.parse_args()
+
+    reader = LogReader(args.log)
+    kinds = np.bincount(reader.records["kind"], minlength=2)
+    print(f"{len(reader)} records: {kinds[KIND_SAMPLE]} samples, {kinds[KIND_TRACK]} track states, "
+          f"{reader.end_time - reader.start_time:.1f}s")
+
+    engine = RadarEngine(0)
+    engine.create_initial_targets()
+    replayer = Replayer(reader, speed=0)
+    replayer.seek(args.start)
+    start = time.perf_counter()
+    while not replayer.finished:
+        apply_records(engine, replayer.advance(0), replayer.time)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed as fast as possible in {elapsed:.3f}s "
+          f"({(len(reader) - reader.find(reader.start_time + args.start)) / max(elapsed, 1e-9):.0f} records/s)")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
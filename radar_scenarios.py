@@ -0,0 +1,288 @@
+# Monte-Carlo runner for the lock and reacquisition tuning constants.
+#
+#   python radar_scenarios.py --runs 500 --lock-radius 30,50,70 --lock-lost-timeout 2,3,6
+#   python radar_scenarios.py --runs 200 --disappear-rate 0.0067,0.02 --output sweep.npz
+#
+# Every comma-separated option is one axis of a parameter grid. Each grid
+# point (a configuration) is run --runs times with different seeds on a
+# headless RadarEngine and a scripted operator, sharded over a process
+# pool, and summarised as lock success rate, time to lock, false lock
+# losses and reacquisition latency.
+import argparse
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from radar_engine import (RadarEngine, TICK, INITIAL_TARGET_COUNT, DISAPPEAR_RATE, REAPPEAR_TIMEOUT,
+                          LOCK_RADIUS, LOCK_LOST_TIMEOUT)
+from radar_files import save_npz
+
+WARMUP = 1.0  # Seconds simulated before the operator starts
+ACQUIRE_DEADLINE = 10.0  # Seconds the operator gets to make the first lock
+DURATION = 120.0  # Seconds simulated after the first lock
+ATTEMPT_INTERVAL = 0.5  # Seconds between the operator's lock key presses
+AIM_ERROR = 15.0  # Standard deviation of where the operator puts the box (cm)
+
+# Grid axes: option name, RadarEngine/operator parameter, default, type
+PARAMETERS = [
+    ("targets", "targets", INITIAL_TARGET_COUNT, int),
+    ("lock-radius", "lock_radius", LOCK_RADIUS, float),
+    ("lock-lost-timeout", "lock_lost_timeout", LOCK_LOST_TIMEOUT, float),
+    ("reappear-timeout", "reappear_timeout", REAPPEAR_TIMEOUT, float),
+    ("disappear-rate", "disappear_rate", DISAPPEAR_RATE, float),
+    ("aim-error", "aim_error", AIM_ERROR, float),
+    ("attempt-interval", "attempt_interval", ATTEMPT_INTERVAL, float),
+]
+
+# Per-run results, one column each
+RUN_FIELDS = ["locked", "time_to_lock", "attempts", "wrong_locks", "lock_losses", "locked_seconds",
+              "reacquired", "reacquire_total", "reacquire_max"]
+
+
+# Scripted operator: every attempt interval, if the chosen target is on
+# screen, put the box near it (with Gaussian aim error) and press the lock
+# key. Locking a different target counts as a wrong lock and is cleared.
+class Operator:
+    def __init__(self, engine, track_id, aim_error, rng):
+        self.engine = engine
+        self.track_id = track_id
+        self.aim_error = aim_error
+        self.rng = rng
+        self.attempts = 0
+        self.wrong_locks = 0
+
+    def index(self):
+        found = np.flatnonzero(self.engine.tracks.track_id == self.track_id)
+        return int(found[0]) if len(found) else None
+
+    # One press of the lock key. Returns True if the target is now locked.
+    def attempt(self):
+        engine = self.engine
+        i = self.index()
+        if i is None or not engine.tracks.visible[i]:
+            return False
+        x, y = engine.tracks.positions(0, 0)
+        dx, dy = self.rng.normal(0, self.aim_error, 2)
+        self.attempts += 1
+        locked = engine.lock_nearest(x[i] + dx, y[i] + dy)
+        if locked is None:
+            return False
+        if locked != i:
+            self.wrong_locks += 1
+            engine.clear_lock()
+            return False
+        return True
+
+    def has_lock(self):
+        i = self.engine.locked_index
+        return i is not None and int(self.engine.tracks.track_id[i]) == self.track_id
+
+
+# Run one seeded scenario and return its RUN_FIELDS as a dict.
+#
+# The operator picks a visible target after WARMUP and tries to lock it
+# until ACQUIRE_DEADLINE. Once locked, the scenario runs for `duration`
+# seconds: every time the engine drops the lock it counts as a false loss
+# (simulated targets never really leave, they only blink out), and the
+# operator goes after the same target again to measure reacquisition.
+def run_scenario(config, seed, duration=DURATION, dt=TICK):
+    engine = RadarEngine(config["targets"], seed=seed, dt=dt)
+    engine.disappear_rate = config["disappear_rate"]
+    engine.reappear_timeout = config["reappear_timeout"]
+    engine.lock_radius = config["lock_radius"]
+    engine.lock_lost_timeout = config["lock_lost_timeout"]
+    rng = np.random.default_rng([seed, 1])
+    every = max(int(round(config["attempt_interval"] / dt)), 1)
+
+    engine.run(int(round(WARMUP / dt)))
+    visible = np.flatnonzero(engine.tracks.visible)
+    if not len(visible):
+        visible = np.arange(len(engine.tracks))
+    target = int(engine.tracks.track_id[rng.choice(visible)])
+    operator = Operator(engine, target, config["aim_error"], rng)
+
+    result = dict.fromkeys(RUN_FIELDS, 0)
+    result["time_to_lock"] = math.nan
+    start = engine.time
+    step = 0
+    while engine.time - start < ACQUIRE_DEADLINE:
+        if step % every == 0 and operator.attempt():
+            break
+        engine.step()
+        step += 1
+    else:
+        result["attempts"] = operator.attempts
+        result["wrong_locks"] = operator.wrong_locks
+        return result
+    result["locked"] = 1
+    result["time_to_lock"] = engine.time - start
+
+    steps = int(round(duration / dt))
+    lost_at = None
+    retry = 0
+    for _ in range(steps):
+        engine.step()
+        if lost_at is None:
+            if operator.has_lock():
+                result["locked_seconds"] += dt
+                continue
+            lost_at = engine.time
+            result["lock_losses"] += 1
+            retry = 0
+        retry += 1
+        if retry % every == 0 and operator.attempt():
+            latency = engine.time - lost_at
+            result["reacquired"] += 1
+            result["reacquire_total"] += latency
+            result["reacquire_max"] = max(result["reacquire_max"], latency)
+            lost_at = None
+    result["attempts"] = operator.attempts
+    result["wrong_locks"] = operator.wrong_locks
+    return result
+
+
+# Worker entry point: run a shard of seeds for one configuration and
+# return (config index, seeds, {field: column})
+def run_shard(index, config, seeds, duration):
+    results = [run_scenario(config, seed, duration) for seed in seeds]
+    columns = {field: np.array([r[field] for r in results], dtype=float) for field in RUN_FIELDS}
+    return index, np.asarray(seeds), columns
+
+
+# Cartesian product of the axis values as a list of config dicts
+def make_grid(axes):
+    names = [name for name, _ in axes]
+    return [dict(zip(names, values)) for values in itertools.product(*(values for _, values in axes))]
+
+
+# Split `runs` seeds per configuration into shards so the pool gets about
+# `per_worker` shards for each worker, which evens out slow configurations.
+# Every configuration uses the same seeds, so they are compared on the same
+# scenarios.
+def make_shards(grid, runs, seed, workers, per_worker=4):
+    total = len(grid) * runs
+    size = max(1, min(runs, math.ceil(total / (workers * per_worker))))
+    shards = []
+    for index, config in enumerate(grid):
+        for start in range(0, runs, size):
+            shards.append((index, config, list(range(seed + start, seed + min(start + size, runs)))))
+    return shards
+
+
+# Per-configuration statistics from the per-run columns
+def summarize(grid, run_config, runs):
+    stats = {name: [] for name in ("lock_success_rate", "time_to_lock_mean", "time_to_lock_p95",
+                                   "wrong_lock_rate", "false_loss_per_min", "reacquire_rate",
+                                   "reacquire_mean", "reacquire_max")}
+    for index in range(len(grid)):
+        mine = run_config == index
+        locked = runs["locked"][mine] > 0
+        times = runs["time_to_lock"][mine][locked]
+        attempts = runs["attempts"][mine].sum()
+        losses = runs["lock_losses"][mine].sum()
+        locked_seconds = runs["locked_seconds"][mine].sum()
+        reacquired = runs["reacquired"][mine].sum()
+        stats["lock_success_rate"].append(locked.mean() if len(locked) else math.nan)
+        stats["time_to_lock_mean"].append(times.mean() if len(times) else math.nan)
+        stats["time_to_lock_p95"].append(np.percentile(times, 95) if len(times) else math.nan)
+        stats["wrong_lock_rate"].append(runs["wrong_locks"][mine].sum() / attempts if attempts else math.nan)
+        stats["false_loss_per_min"].append(losses / locked_seconds * 60 if locked_seconds else math.nan)
+        stats["reacquire_rate"].append(reacquired / losses if losses else math.nan)
+        stats["reacquire_mean"].append(runs["reacquire_total"][mine].sum() / reacquired if reacquired else math.nan)
+        stats["reacquire_max"].append(runs["reacquire_max"][mine].max() if reacquired else math.nan)
+    return {name: np.array(values, dtype=float) for name, values in stats.items()}
+
+
+# Run every configuration of `grid` `runs` times over a process pool.
+# Returns (run_config, run_seed, per-run columns), with runs sorted by
+# configuration then seed.
+def run_grid(grid, runs, seed=0, duration=DURATION, workers=None, progress=True):
+    workers = workers or os.cpu_count() or 1
+    shards = make_shards(grid, runs, seed, workers)
+    parts = []
+    done = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_shard, index, config, seeds, duration) for index, config, seeds in shards]
+        for future in as_completed(futures):
+            parts.append(future.result())
+            done += len(parts[-1][1])
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"\r{done}/{len(grid) * runs} scenarios, {elapsed:.0f}s", end="", flush=True)
+    if progress:
+        print()
+    parts.sort(key=lambda part: (part[0], part[1][0]))
+    run_config = np.concatenate([np.full(len(seeds), index) for index, seeds, _ in parts])
+    run_seed = np.concatenate([seeds for _, seeds, _ in parts])
+    columns = {field: np.concatenate([part[2][field] for part in parts]) for field in RUN_FIELDS}
+    return run_config, run_seed, columns
+
+
+# Write configurations, their statistics and the raw runs as columns of one
+# compressed .npz: config_<param> and stat columns are one row per
+# configuration, run_<field> one row per scenario
+def save_results(path, grid, stats, run_config, run_seed, runs):
+    columns = {}
+    for name in grid[0]:
+        columns["config_" + name] = np.array([config[name] for config in grid])
+    columns.update(stats)
+    columns["run_config"] = run_config.astype(np.int32)
+    columns["run_seed"] = run_seed.astype(np.int64)
+    for field, values in runs.items():
+        columns["run_" + field] = values.astype(np.float32)
+    save_npz(path, **columns)
+
+
+def print_table(grid, stats, axes):
+    varied = [name for name, values in axes if len(values) > 1]
+    header = [name for name in varied] + ["lock %", "t_lock", "t_lock95", "wrong %", "loss/min",
+                                          "reacq %", "t_reacq", "t_reacq_max"]
+    print("  ".join(f"{h:>11}" for h in header))
+    for index, config in enumerate(grid):
+        row = [f"{config[name]:>11g}" for name in varied]
+        row += [f"{stats['lock_success_rate'][index] * 100:>11.1f}",
+                f"{stats['time_to_lock_mean'][index]:>11.2f}",
+                f"{stats['time_to_lock_p95'][index]:>11.2f}",
+                f"{stats['wrong_lock_rate'][index] * 100:>11.1f}",
+                f"{stats['false_loss_per_min'][index]:>11.3f}",
+                f"{stats['reacquire_rate'][index] * 100:>11.1f}",
+                f"{stats['reacquire_mean'][index]:>11.2f}",
+                f"{stats['reacquire_max'][index]:>11.2f}"]
+        print("  ".join(row))
+
+
+def parse_values(text, kind):
+    return [kind(v) for v in text.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the lock tuning constants over seeded headless scenarios")
+    for option, name, default, kind in PARAMETERS:
+        parser.add_argument("--" + option, dest=name, default=str(default),
+                            help=f"comma-separated values to sweep (default {default})")
+    parser.add_argument("--runs", type=int, default=100, help="scenarios per configuration")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds simulated after the first lock")
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--output", help="write configurations, statistics and runs to this .npz file")
+    args = parser.parse_args()
+
+    axes = [(name, parse_values(getattr(args, name), kind)) for _, name, _, kind in PARAMETERS]
+    grid = make_grid(axes)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"{len(grid)} configurations x {args.runs} runs on {workers} workers")
+    start = time.perf_counter()
+    run_config, run_seed, runs = run_grid(grid, args.runs, args.seed, args.duration, workers)
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+    stats = summarize(grid, run_config, runs)
+    print_table(grid, stats, axes)
+    if args.output:
+        save_results(args.output, grid, stats, run_config, run_seed, runs)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import time
+
+RENDER_FPS = 30  # Target display frame rate
+INFO_HZ = 4  # Refresh rate of the info panel and clock text
+MAX_CATCHUP_STEPS = 10  # Most simulation steps run for one wake-up
+
+
+# Deadline-based frame scheduler. The simulation runs in fixed `sim_dt`
+# steps paid for out of real elapsed time, so motion speed doesn't depend
+# on how long frames take to draw. Rendering and the slow info refresh have
+# their own deadlines; when a frame is late the missed frames are dropped
+# and the next deadline is set from now instead of piling up. The caller
+# asks what is due with the current time and sleeps for delay_ms().
+# A caller that never steps the simulation (a replay or a feed client)
+# clears `stepping` so the step deadline doesn't keep it awake.
+class FrameScheduler:
+    def __init__(self, sim_dt, fps=RENDER_FPS, info_hz=INFO_HZ, clock=time.perf_counter):
+        self.sim_dt = sim_dt
+        self.frame_interval = 1.0 / fps
+        self.info_interval = 1.0 / info_hz
+        self.clock = clock
+        now = clock()
+        self.next_step = now
+        self.next_frame = now
+        self.next_info = now
+        self.stepping = True
+        # Counters
+        self.steps = 0
+        self.steps_dropped = 0
+        self.frames = 0
+        self.frames_dropped = 0
+
+    # Number of simulation steps due by `now`. If the loop fell more than
+    # MAX_CATCHUP_STEPS behind (a stall, a debugger), the backlog is dropped
+    # so the simulation doesn't try to catch up in one burst.
+    def sim_steps(self, now):
+        if now < self.next_step:
+            return 0
+        due = int((now - self.next_step) / self.sim_dt) + 1
+        if due > MAX_CATCHUP_STEPS:
+            self.steps_dropped += due - MAX_CATCHUP_STEPS
+            self.next_step = now + self.sim_dt
+            due = MAX_CATCHUP_STEPS
+        else:
+            self.next_step += due * self.sim_dt
+        self.steps += due
+        return due
+
+    # Whether a frame should be drawn now. Frames that were missed while
+    # over budget are counted and skipped rather than drawn late.
+    def render_due(self, now):
+        if now < self.next_frame:
+            return False
+        missed = int((now - self.next_frame) / self.frame_interval)
+        if missed:
+            self.frames_dropped += missed
+            self.next_frame = now + self.frame_interval
+        else:
+            self.next_frame += self.frame_interval
+        self.frames += 1
+        return True
+
+    # Whether the slow-changing text should be refreshed now
+    def info_due(self, now):
+        if now < self.next_info:
+            return False
+        self.next_info += self.info_interval
+        if self.next_info <= now:
+            self.next_info = now + self.info_interval
+        return True
+
+    # Milliseconds to wait before the next step (if stepping) or frame is due
+    def delay_ms(self, now=None):
+        if now is None:
+            now = self.clock()
+        deadline = min(self.next_step, self.next_frame) if self.stepping else self.next_frame
+        wait = deadline - now
+        return max(int(wait * 1000), 1)
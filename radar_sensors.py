@@ -0,0 +1,224 @@
+# Several radar boards feeding one display.
+#
+#   python radar_gui.py --all-ports                       # every serial port
+#   python radar_gui.py --all-ports --match "2E8A"        # only Raspberry Pi Picos
+#   python radar_gui.py --port /dev/ttyACM0 --port /dev/ttyACM1@120,0,180
+#
+# A port spec is DEVICE[@X,Y,BEARING]: where the board sits relative to the
+# radar centre (cm) and which way its 0 degree axis points (degrees).
+import heapq
+import math
+import re
+import numpy as np
+import serial
+import serial.tools.list_ports
+from radar_ingest import SampleRing, SerialReader
+
+BAUDRATE = 9600
+MAX_HOLD = 0.5  # Seconds a quiet sensor may hold back the merged stream
+
+
+# Where a sensor is mounted. Its samples are (angle, distance) from its own
+# position and heading; to_radar() turns them into the radar's frame.
+class SensorMount:
+    def __init__(self, x=0.0, y=0.0, bearing=0.0):
+        self.x = x
+        self.y = y
+        self.bearing = bearing
+
+    @property
+    def is_origin(self):
+        return self.x == 0 and self.y == 0 and self.bearing == 0
+
+    def to_radar(self, angles, distances):
+        if self.is_origin:
+            return angles, distances
+        rad = np.radians(angles + self.bearing)
+        x = self.x + distances * np.cos(rad)
+        y = self.y + distances * np.sin(rad)
+        return np.degrees(np.arctan2(y, x)) % 360, np.hypot(x, y)
+
+    def __repr__(self):
+        return f"SensorMount({self.x:g}, {self.y:g}, {self.bearing:g})"
+
+
+# Split "DEVICE[@X,Y,BEARING]" into the device and its mount
+def parse_port_spec(spec):
+    device, _, mount = spec.partition("@")
+    if not mount:
+        return device, SensorMount()
+    try:
+        x, y, bearing = (float(v) for v in mount.split(","))
+    except ValueError:
+        raise ValueError(f"Bad sensor mount {mount!r} in {spec!r}, expected X,Y,BEARING")
+    return device, SensorMount(x, y, bearing)
+
+
+# Devices of every serial port, or of the ones whose device name,
+# description or hardware ID matches the regex `match`
+def find_ports(match=None):
+    ports = list(serial.tools.list_ports.comports())
+    if match:
+        pattern = re.compile(match, re.IGNORECASE)
+        ports = [p for p in ports if any(pattern.search(field or "")
+                                         for field in (p.device, p.description, p.hwid))]
+    return [p.device for p in ports]
+
+
+# One board: its port, mount, ring buffer and reader thread
+class Sensor:
+    def __init__(self, ser, mount=None, ring=None):
+        self.ser = ser
+        self.name = ser.name
+        self.mount = mount if mount is not None else SensorMount()
+        self.ring = ring if ring is not None else SampleRing()
+        self.reader = SerialReader(ser, self.ring)
+        # Merge state: time-ordered samples not yet released, newest time seen
+        self.pending = (np.empty(0), np.empty(0), np.empty(0))
+        self.last_time = -math.inf
+        self.last_arrival = None
+
+    def start(self):
+        self.reader.start()
+
+
+# Open a serial port, or print why not and return None
+def open_port(device, baudrate=BAUDRATE):
+    try:
+        ser = serial.Serial(device, baudrate=baudrate, timeout=1)
+        print(f"Connected to {device}")
+        return ser
+    except Exception as e:
+        print(f"Could not connect to {device}: {e}")
+        return None
+
+
+# Open sensors from port specs (see parse_port_spec), skipping any that
+# fail to open
+def open_sensors(specs, baudrate=BAUDRATE):
+    sensors = []
+    for spec in specs:
+        device, mount = parse_port_spec(spec)
+        ser = open_port(device, baudrate)
+        if ser is not None:
+            sensors.append(Sensor(ser, mount))
+    return sensors
+
+
+# Reads every sensor concurrently (one SerialReader thread each) and
+# merges their samples into one time-ordered stream in the radar's frame.
+#
+# Each sensor's samples are already in time order, so the streams are
+# combined with a k-way heap merge on their timestamps. Samples are only
+# released up to the watermark, the oldest "newest sample" among sensors
+# that are still talking: anything older can no longer be overtaken by a
+# late batch from another board. A sensor that has been quiet for MAX_HOLD
+# seconds stops holding the others back. A board's DeviceClock can still
+# pull its next samples back by a few milliseconds of latency jitter after
+# older ones arrived; those are clamped to the sensor's newest time, and
+# anything released late to the last released time, so the stream never
+# runs backwards.
+class SensorHub:
+    def __init__(self, sensors, max_hold=MAX_HOLD):
+        self.sensors = list(sensors)
+        self.max_hold = max_hold
+        self.released_time = -math.inf
+
+    def __len__(self):
+        return len(self.sensors)
+
+    @property
+    def names(self):
+        return [sensor.name for sensor in self.sensors]
+
+    @property
+    def is_open(self):
+        return any(sensor.ser.is_open for sensor in self.sensors)
+
+    @property
+    def bytes_read(self):
+        return sum(sensor.reader.bytes_read for sensor in self.sensors)
+
+    @property
+    def errors(self):
+        return sum(sensor.reader.parser.errors for sensor in self.sensors)
+
+    @property
+    def overruns(self):
+        return sum(sensor.ring.overruns for sensor in self.sensors)
+
+    # Samples lost on the link, from gaps in the binary frames' sequence numbers
+    @property
+    def dropped(self):
+        return sum(sensor.reader.parser.binary.dropped for sensor in self.sensors)
+
+    def start(self):
+        for sensor in self.sensors:
+            sensor.start()
+
+    def stop(self, timeout=None):
+        for sensor in self.sensors:
+            sensor.reader.stop(timeout)
+
+    # Take the samples that are ready as (angles, distances, times), merged
+    # in time order. `now` is the host time used to tell quiet sensors apart.
+    def drain(self, now):
+        for sensor in self.sensors:
+            angles, distances, times = sensor.ring.drain()
+            if not len(angles):
+                continue
+            angles, distances = sensor.mount.to_radar(angles, distances)
+            order = np.argsort(times, kind="stable")
+            times = np.maximum(times[order], sensor.last_time)
+            pa, pd, pt = sensor.pending
+            sensor.pending = (np.concatenate((pa, angles[order])),
+                              np.concatenate((pd, distances[order])),
+                              np.concatenate((pt, times)))
+            sensor.last_time = float(times[-1])
+            sensor.last_arrival = now
+
+        active = [sensor.last_time for sensor in self.sensors
+                  if sensor.last_arrival is not None and now - sensor.last_arrival < self.max_hold]
+        watermark = min(active) if active else math.inf
+
+        streams = []
+        for k, sensor in enumerate(self.sensors):
+            angles, distances, times = sensor.pending
+            ready = int(np.searchsorted(times, watermark, side="right"))
+            if ready:
+                streams.append(zip(times[:ready].tolist(), [k] * ready,
+                                   angles[:ready].tolist(), distances[:ready].tolist()))
+                sensor.pending = (angles[ready:], distances[ready:], times[ready:])
+        if not streams:
+            return np.empty(0), np.empty(0), np.empty(0)
+        if len(streams) == 1:
+            merged = list(streams[0])
+        else:
+            merged = list(heapq.merge(*streams))
+        times, _, angles, distances = zip(*merged)
+        times = np.maximum(np.array(times), self.released_time)
+        self.released_time = float(times[-1])
+        return np.array(angles), np.array(distances), times
+
+
+def add_sensor_arguments(parser):
+    parser.add_argument("--port", action="append", metavar="DEVICE[@X,Y,BEARING]",
+                        help="sensor port with its optional mount position and bearing (repeatable)")
+    parser.add_argument("--all-ports", action="store_true", help="read every serial port")
+    parser.add_argument("--match", metavar="REGEX",
+                        help="with --all-ports, only ports whose name, description or hardware ID match")
+
+
+# Open the sensors chosen by the add_sensor_arguments() options. With none
+# of them given, only the first available port is used.
+def open_hub(args):
+    if args.port or args.all_ports:
+        specs = list(args.port or [])
+        if args.all_ports:
+            configured = {parse_port_spec(spec)[0] for spec in specs}
+            specs += [device for device in find_ports(args.match) if device not in configured]
+    else:
+        specs = find_ports()[:1]
+    if not specs:
+        print("No serial ports found")
+    return SensorHub(open_sensors(specs))
@@ -0,0 +1,371 @@
+# Fan-out server: one process owns the sensor ports, runs ingestion and
+# tracking once, and publishes the track picture to any number of displays.
+#
+#   python radar_server.py --all-ports                    # listen on 127.0.0.1:7700
+#   python radar_server.py --listen /tmp/radar.sock       # Unix socket
+#   python radar_gui.py --connect 127.0.0.1:7700          # a display
+#
+# Messages are a (kind u8, length u32) header and a payload of META followed,
+# for a delta, by the changed track indices, then the track records. A new
+# subscriber first gets a full snapshot, then deltas against the previous
+# publish. A subscriber whose socket hasn't taken the last message yet is
+# skipped instead of queued for, and gets a fresh snapshot once it catches
+# up, so a stalled display costs the server nothing.
+import argparse
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from radar_engine import RadarEngine
+from radar_scheduler import FrameScheduler
+from radar_sensors import add_sensor_arguments, open_hub
+from radar_clutter import add_clutter_arguments, make_clutter, save_clutter
+
+DEFAULT_ADDRESS = "127.0.0.1:7700"
+PUBLISH_HZ = 20  # Track updates sent per second
+
+MSG_SNAPSHOT = 1
+MSG_DELTA = 2
+HEADER = struct.Struct("<BI")  # Kind, payload length
+META = struct.Struct("<IdIII")  # Sequence, time, track count, simulated track count, records
+
+TRACK_DTYPE = np.dtype([
+    ("id", "<u8"),
+    ("angle", "<f4"),
+    ("distance", "<f4"),
+    ("type_code", "u1"),
+    ("visible", "u1"),
+    ("name", "S12"),
+])
+
+
+# "host:port" for TCP, anything with a slash for a Unix socket path
+def parse_address(address):
+    if "/" in address:
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def snapshot_records(snapshot):
+    records = np.zeros(len(snapshot), dtype=TRACK_DTYPE)
+    records["id"] = snapshot.track_id
+    records["angle"] = snapshot.angle
+    records["distance"] = snapshot.distance
+    records["type_code"] = snapshot.type_code
+    records["visible"] = snapshot.visible
+    records["name"] = [name.encode()[:12] for name in snapshot.names]
+    return records
+
+
+def encode_message(kind, seq, now, base_count, records, indices=None):
+    count = len(records) if indices is None else len(indices)
+    parts = [META.pack(seq, now, len(records), base_count, count)]
+    if indices is None:
+        parts.append(records.tobytes())
+    else:
+        parts.append(indices.astype("<u4").tobytes())
+        parts.append(records[indices].tobytes())
+    payload = b"".join(parts)
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+class _Subscriber:
+    __slots__ = ("sock", "out", "needs_snapshot", "skipped")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.out = bytearray()
+        self.needs_snapshot = True
+        self.skipped = 0
+
+
+# Publishes an engine's tracks to subscribers over non-blocking sockets.
+# Everything runs on one thread around a selector: the engine is stepped on
+# a FrameScheduler, and sockets are only written when they can take data.
+class FeedServer:
+    def __init__(self, engine, sensors, address=DEFAULT_ADDRESS, publish_hz=PUBLISH_HZ):
+        self.engine = engine
+        self.sensors = sensors
+        family, addr = parse_address(address)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        self.path = None
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        else:
+            # A socket file left behind by a server that didn't shut down cleanly
+            self.path = addr
+            if os.path.exists(addr):
+                os.unlink(addr)
+        self.listener.bind(addr)
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.scheduler = FrameScheduler(engine.dt, publish_hz)
+        self.subscribers = {}
+        self.seq = 0
+        self.records = np.zeros(0, dtype=TRACK_DTYPE)
+        self.running = False
+        self.published = 0
+        self.bytes_sent = 0
+
+    def _accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        subscriber = _Subscriber(sock)
+        self.subscribers[sock] = subscriber
+        self.selector.register(sock, selectors.EVENT_READ, subscriber)
+        self.engine.log(f"Subscriber connected ({len(self.subscribers)} total)")
+
+    def _drop(self, subscriber):
+        self.selector.unregister(subscriber.sock)
+        subscriber.sock.close()
+        del self.subscribers[subscriber.sock]
+        self.engine.log(f"Subscriber disconnected ({len(self.subscribers)} left)")
+
+    # Send as much of a subscriber's pending bytes as the socket will take
+    def _flush(self, subscriber):
+        try:
+            sent = subscriber.sock.send(subscriber.out)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop(subscriber)
+            return
+        del subscriber.out[:sent]
+        self.bytes_sent += sent
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if subscriber.out else 0)
+        self.selector.modify(subscriber.sock, events, subscriber)
+
+    # Publish the engine's current tracks. Deltas are computed once and
+    # shared by every subscriber that is in step.
+    def publish(self):
+        snapshot = self.engine.snapshot()
+        records = snapshot_records(snapshot)
+        previous = self.records
+        self.seq += 1
+        self.records = records
+        self.published += 1
+        if not self.subscribers:
+            return
+        common = min(len(previous), len(records))
+        changed = np.flatnonzero(previous[:common] != records[:common])
+        indices = np.concatenate((changed, np.arange(common, len(records))))
+        delta = snapshot_message = None
+        for subscriber in list(self.subscribers.values()):
+            if subscriber.out:
+                # Still sending an older message: skip this one and resync later
+                subscriber.needs_snapshot = True
+                subscriber.skipped += 1
+                continue
+            if subscriber.needs_snapshot:
+                if snapshot_message is None:
+                    snapshot_message = encode_message(MSG_SNAPSHOT, self.seq, snapshot.time,
+                                                      snapshot.base_count, records)
+                subscriber.out += snapshot_message
+                subscriber.needs_snapshot = False
+            else:
+                if delta is None:
+                    delta = encode_message(MSG_DELTA, self.seq, snapshot.time,
+                                           snapshot.base_count, records, indices)
+                subscriber.out += delta
+            self._flush(subscriber)
+
+    def _handle(self, key, mask):
+        if key.fileobj is self.listener:
+            self._accept()
+            return
+        subscriber = key.data
+        if mask & selectors.EVENT_READ:
+            # Subscribers don't send anything; a read means data to discard or a hangup
+            try:
+                hangup = not subscriber.sock.recv(4096)
+            except BlockingIOError:
+                hangup = False
+            except OSError:
+                hangup = True
+            if hangup:
+                self._drop(subscriber)
+                return
+        if mask & selectors.EVENT_WRITE and subscriber.out:
+            self._flush(subscriber)
+
+    # Run ingestion, tracking and publishing until stop() or `duration` seconds
+    def serve_forever(self, duration=None):
+        engine = self.engine
+        scheduler = self.scheduler
+        sensors = self.sensors
+        sensors.start()
+        self.running = True
+        end = None if duration is None else scheduler.clock() + duration
+        while self.running and (end is None or scheduler.clock() < end):
+            now = scheduler.clock()
+            angles, distances, times = sensors.drain(time.time())
+            if len(angles):
+                engine.add_detections(angles, distances, times)
+            steps = scheduler.sim_steps(now)
+            if steps:
+                engine.run(steps)
+            if scheduler.render_due(now):
+                self.publish()
+            for key, mask in self.selector.select(scheduler.delay_ms() / 1000):
+                self._handle(key, mask)
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        for subscriber in list(self.subscribers.values()):
+            self._drop(subscriber)
+        self.selector.close()
+        self.listener.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+# Subscriber side. A background thread reads messages and keeps a mirror of
+# the server's tracks; take() returns the newest state, if there is one the
+# caller hasn't seen, as (time, base_count, records).
+class FeedClient(threading.Thread):
+    def __init__(self, address=DEFAULT_ADDRESS):
+        super().__init__(daemon=True)
+        self.address = address
+        family, addr = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.connect(addr)
+        self.records = np.zeros(0, dtype=TRACK_DTYPE)
+        self.seq = None
+        self.time = 0.0
+        self.base_count = 0
+        self.updated = False
+        self.snapshots = 0
+        self.deltas = 0
+        self.bytes_read = 0
+        self.error = None
+        self.lock = threading.Lock()
+
+    def _read_exactly(self, n):
+        data = bytearray()
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("feed server closed the connection")
+            data += chunk
+        self.bytes_read += n
+        return data
+
+    def run(self):
+        try:
+            while True:
+                kind, length = HEADER.unpack(self._read_exactly(HEADER.size))
+                self._apply(kind, self._read_exactly(length))
+        except OSError as e:
+            self.error = e
+            print(f"Feed connection lost: {e}")
+
+    def _apply(self, kind, payload):
+        seq, now, count, base_count, n = META.unpack_from(payload)
+        offset = META.size
+        if kind == MSG_DELTA:
+            if self.seq is None or seq != self.seq + 1:
+                return  # Out of step; the server sends a snapshot next
+            indices = np.frombuffer(payload, dtype="<u4", count=n, offset=offset)
+            offset += indices.nbytes
+        records = np.frombuffer(payload, dtype=TRACK_DTYPE, count=n, offset=offset)
+        with self.lock:
+            if kind == MSG_SNAPSHOT:
+                self.records = records.copy()
+                self.snapshots += 1
+            else:
+                mirror = np.zeros(count, dtype=TRACK_DTYPE)
+                keep = min(count, len(self.records))
+                mirror[:keep] = self.records[:keep]
+                mirror[indices] = records
+                self.records = mirror
+                self.deltas += 1
+            self.seq = seq
+            self.time = now
+            self.base_count = base_count
+            self.updated = True
+
+    def take(self):
+        with self.lock:
+            if not self.updated:
+                return None
+            self.updated = False
+            return self.time, self.base_count, self.records.copy()
+
+    def close(self):
+        self.sock.close()
+
+
+# Load a feed state into an engine, keeping the engine's own lock on the
+# same track (by ID) if it is still there. The client doesn't step its
+# engine, so the lock-lost timeout is run here: the time the locked track
+# went missing is carried across feed states, and the lock drops once it
+# has been missing for longer than the engine's lock_lost_timeout.
+def apply_feed(engine, state):
+    now, base_count, records = state
+    tracks = engine.tracks
+    locked_id = None
+    if engine.locked_index is not None and engine.locked_index < len(tracks):
+        locked_id = int(tracks.track_id[engine.locked_index])
+    lock_time = engine.lock_time
+    lock_lost_time = engine.lock_lost_time
+    ids = records["id"].astype(np.int64)
+    locked = None
+    if locked_id is not None:
+        found = np.flatnonzero(ids == locked_id)
+        if len(found):
+            locked = int(found[0])
+        else:
+            engine.log("Lock lost - track no longer in the feed")
+    engine.load_tracks(records["angle"].astype(float), records["distance"].astype(float),
+                       records["visible"] != 0, records["type_code"],
+                       [name.decode() for name in records["name"].tolist()], locked, now, ids=ids)
+    engine.base_count = base_count
+    if locked is None:
+        return
+    engine.lock_time = lock_time
+    if records["visible"][locked]:
+        return
+    if lock_lost_time is None:
+        engine.lock_lost_time = now
+    elif now - lock_lost_time > engine.lock_lost_timeout:
+        engine.log("Lock lost - target out of radar range for too long")
+        engine.clear_lock()
+    else:
+        engine.lock_lost_time = lock_lost_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Own the radar sensors and publish tracks to displays")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="host:port, or a Unix socket path")
+    parser.add_argument("--rate", type=float, default=PUBLISH_HZ, help="track updates per second")
+    add_sensor_arguments(parser)
+    add_clutter_arguments(parser)
+    args = parser.parse_args()
+
+    clutter = make_clutter(args)
+    engine = RadarEngine(verbose=True, clutter=clutter)
+    server = FeedServer(engine, open_hub(args), args.listen, args.rate)
+    print(f"Publishing on {args.listen}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        save_clutter(clutter, args)
+
+
+if __name__ == "__main__":
+    main()
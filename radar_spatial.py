@@ -0,0 +1,85 @@
+import math
+import numpy as np
+
+
+# Uniform grid over the radar's screen area. Points are bucketed by cell
+# with a counting sort (CSR layout: `order` holds point indices grouped by
+# cell and `cell_start` where each cell's run begins), so a rebuild is a few
+# NumPy calls and a query only looks at the cells it overlaps. Query cost
+# depends on how many points are near the query, not on the total count.
+class GridIndex:
+    def __init__(self, left, top, width, height, cell_size=25):
+        self.left = left
+        self.top = top
+        self.cell_size = cell_size
+        self.cols = max(int(math.ceil(width / cell_size)), 1)
+        self.rows = max(int(math.ceil(height / cell_size)), 1)
+        self.order = np.empty(0, dtype=np.intp)
+        self.cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _cell(self, x, y):
+        col = min(max(int((x - self.left) // self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y - self.top) // self.cell_size), 0), self.rows - 1)
+        return col, row
+
+    # Re-bucket every point. `mask` limits the index to a subset of points;
+    # query results are always indices into the full xs/ys arrays.
+    def build(self, xs, ys, mask=None):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        idx = np.arange(len(xs)) if mask is None else np.flatnonzero(mask)
+        cols = np.clip(((xs[idx] - self.left) // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        rows = np.clip(((ys[idx] - self.top) // self.cell_size).astype(np.intp), 0, self.rows - 1)
+        cells = rows * self.cols + cols
+        self.order = idx[np.argsort(cells, kind="stable")]
+        counts = np.bincount(cells, minlength=self.cols * self.rows)
+        np.cumsum(counts, out=self.cell_start[1:])
+        self.xs = xs
+        self.ys = ys
+
+    # Indices of every point in the cells overlapping a box
+    def _candidates(self, left, top, right, bottom):
+        col0, row0 = self._cell(left, top)
+        col1, row1 = self._cell(right, bottom)
+        start = self.cell_start
+        parts = []
+        for row in range(row0, row1 + 1):
+            base = row * self.cols
+            lo = start[base + col0]
+            hi = start[base + col1 + 1]
+            if hi > lo:
+                parts.append(self.order[lo:hi])
+        if not parts:
+            return self.order[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    # Points inside the rectangle (edges included)
+    def rect(self, left, top, right, bottom):
+        cand = self._candidates(left, top, right, bottom)
+        x = self.xs[cand]
+        y = self.ys[cand]
+        return cand[(x >= left) & (x <= right) & (y >= top) & (y <= bottom)]
+
+    # Points within `radius` of (x, y)
+    def radius(self, x, y, radius):
+        cand = self._candidates(x - radius, y - radius, x + radius, y + radius)
+        dist = np.hypot(self.xs[cand] - x, self.ys[cand] - y)
+        return cand[dist <= radius]
+
+    # Closest point to (x, y) that is strictly nearer than max_distance.
+    # Returns (index, distance), or (None, inf) if there is none.
+    def nearest(self, x, y, max_distance):
+        cand = self._candidates(x - max_distance, y - max_distance,
+                                x + max_distance, y + max_distance)
+        if not len(cand):
+            return None, float("inf")
+        dist = np.hypot(self.xs[cand] - x, self.ys[cand] - y)
+        best = int(np.argmin(dist))
+        if dist[best] >= max_distance:
+            return None, float("inf")
+        return int(cand[best]), float(dist[best])
@@ -0,0 +1,244 @@
+import numpy as np
+
+# Tracker settings. Positions are Cartesian, relative to the radar centre, in
+# the same units as the sensor's distances (cm).
+MEASUREMENT_NOISE = 3.0  # Std dev of a detection's position
+ACCEL_NOISE = 5.0  # Std dev of unmodelled acceleration (cm/s^2)
+INITIAL_SPEED = 10.0  # Std dev of a new track's unknown velocity (cm/s)
+GATE = 9.21  # Chi-square gate on the squared Mahalanobis distance (2 dof, 99%)
+CONFIRM_HITS = 2  # Updates before a tentative track is shown
+TENTATIVE_TIMEOUT = 12.0  # Drop tentative tracks not confirmed within this many seconds
+VISIBLE_WINDOW = 12.0  # Confirmed tracks count as visible this long after an update
+DELETE_AFTER = 20.0  # Drop tracks that haven't been updated for this long
+BIRTH_CELL = 10.0  # Unassigned detections closer than this start a single track
+
+
+# Minimum-cost assignment for a (rows, cols) cost matrix by the Hungarian
+# method (shortest augmenting paths with row and column potentials). Every
+# row of the smaller side is matched; returns the matched (rows, cols).
+def _hungarian(cost):
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.intp)  # Row (1-based) matched to each column; column 0 is the root
+    way = np.zeros(m + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            free = ~used
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free[1:] & (reduced < slack[1:])
+            slack[1:][better] = reduced[better]
+            way[1:][better] = j0
+            j1 = int(np.argmin(np.where(free, slack, np.inf)))
+            delta = slack[j1]
+            u[match[used]] += delta
+            v[used] -= delta
+            slack[free] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    cols = np.flatnonzero(match[1:])
+    rows = match[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    return rows, cols
+
+
+# Multi-target tracker for raw (angle, distance) detections. Every track is
+# a constant-velocity Kalman filter, stored as rows of shared arrays so that
+# predict and update run over all tracks at once. Each batch of detections
+# is treated as one scan: tracks are predicted to the scan time, detections
+# are gated by Mahalanobis distance and assigned to tracks by a minimum-cost
+# assignment, unassigned detections start tentative tracks, and tracks that
+# go unobserved for too long are deleted.
+class Tracker:
+    def __init__(self, measurement_noise=MEASUREMENT_NOISE, accel_noise=ACCEL_NOISE):
+        self.r = measurement_noise ** 2
+        self.q = accel_noise ** 2
+        self.state = np.zeros((0, 4))  # x, y, vx, vy
+        self.cov = np.zeros((0, 4, 4))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.born = np.zeros(0)
+        self.last_update = np.zeros(0)
+        self.time = None  # Time the state was last predicted to
+        self.next_id = 1
+        self.births = 0
+        self.deaths = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def confirmed(self):
+        return self.hits >= CONFIRM_HITS
+
+    # Predict every track forward to time `t`
+    def predict(self, t):
+        if self.time is None:
+            self.time = t
+            return
+        dt = t - self.time
+        if dt <= 0:
+            return
+        self.time = t
+        if not len(self):
+            return
+        f = np.eye(4)
+        f[0, 2] = f[1, 3] = dt
+        q = self.q * np.array([[dt**4 / 4, 0, dt**3 / 2, 0],
+                               [0, dt**4 / 4, 0, dt**3 / 2],
+                               [dt**3 / 2, 0, dt**2, 0],
+                               [0, dt**3 / 2, 0, dt**2]])
+        self.state = self.state @ f.T
+        self.cov = f @ self.cov @ f.T + q
+
+    # Squared Mahalanobis distance of every detection from every track,
+    # shape (tracks, detections)
+    def _distances(self, z):
+        s = self.cov[:, :2, :2] + self.r * np.eye(2)
+        det = s[:, 0, 0] * s[:, 1, 1] - s[:, 0, 1] * s[:, 1, 0]
+        inv = np.empty_like(s)
+        inv[:, 0, 0] = s[:, 1, 1] / det
+        inv[:, 1, 1] = s[:, 0, 0] / det
+        inv[:, 0, 1] = -s[:, 0, 1] / det
+        inv[:, 1, 0] = -s[:, 1, 0] / det
+        nu = z[None, :, :] - self.state[:, None, :2]
+        return np.einsum("tdi,tij,tdj->td", nu, inv, nu)
+
+    # Minimum-cost assignment of tracks to detections. Tracks and
+    # detections split into clusters joined by gated pairs, and each
+    # cluster is solved on its own: a lone track or detection takes its
+    # closest gated partner, anything larger goes to the Hungarian solver.
+    # The solver first pairs off as many tracks as the gates allow and then
+    # minimises the summed distance, so crossing targets each keep a track.
+    def _assign(self, d2):
+        gated = d2 < GATE
+        n_tracks, n_dets = d2.shape
+        # Label every track with the smallest track index it is connected to
+        track_label = np.arange(n_tracks)
+        while True:
+            det_label = np.where(gated, track_label[:, None], n_tracks).min(axis=0, initial=n_tracks)
+            label = np.minimum(track_label, np.where(gated, det_label[None, :], n_tracks).min(axis=1, initial=n_tracks))
+            if np.array_equal(label, track_label):
+                break
+            track_label = label
+        pairs_t = []
+        pairs_d = []
+        for cluster in np.unique(track_label[gated.any(axis=1)]):
+            rows = np.flatnonzero(track_label == cluster)
+            cols = np.flatnonzero(det_label == cluster)
+            cost = d2[np.ix_(rows, cols)]
+            if len(rows) == 1:
+                t, d = np.zeros(1, dtype=np.intp), np.argmin(cost, axis=1)
+            elif len(cols) == 1:
+                t, d = np.argmin(cost, axis=0), np.zeros(1, dtype=np.intp)
+            else:
+                # A pair outside the gate costs more than any full set of
+                # gated pairs, so it is only used when nothing else fits
+                t, d = _hungarian(np.where(gated[np.ix_(rows, cols)], cost, GATE * (len(rows) + len(cols))))
+                inside = cost[t, d] < GATE
+                t, d = t[inside], d[inside]
+            pairs_t.append(rows[t])
+            pairs_d.append(cols[d])
+        if not pairs_t:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        return np.concatenate(pairs_t), np.concatenate(pairs_d)
+
+    # Kalman update of tracks `t` with detections z[d]
+    def _update(self, t, zs, now):
+        p = self.cov[t]
+        s = p[:, :2, :2] + self.r * np.eye(2)
+        k = p[:, :, :2] @ np.linalg.inv(s)
+        nu = zs - self.state[t, :2]
+        self.state[t] += np.einsum("nij,nj->ni", k, nu)
+        self.cov[t] = p - k @ p[:, :2, :]
+        self.hits[t] += 1
+        self.last_update[t] = now
+
+    def _birth(self, zs, now):
+        n = len(zs)
+        if not n:
+            return
+        state = np.zeros((n, 4))
+        state[:, :2] = zs
+        cov = np.zeros((n, 4, 4))
+        cov[:, 0, 0] = cov[:, 1, 1] = self.r
+        cov[:, 2, 2] = cov[:, 3, 3] = INITIAL_SPEED ** 2
+        self.state = np.concatenate((self.state, state))
+        self.cov = np.concatenate((self.cov, cov))
+        self.ids = np.concatenate((self.ids, np.arange(self.next_id, self.next_id + n)))
+        self.hits = np.concatenate((self.hits, np.ones(n, dtype=np.int64)))
+        self.born = np.concatenate((self.born, np.full(n, now)))
+        self.last_update = np.concatenate((self.last_update, np.full(n, now)))
+        self.next_id += n
+        self.births += n
+
+    def _keep(self, keep):
+        self.deaths += int(len(keep) - keep.sum())
+        self.state = self.state[keep]
+        self.cov = self.cov[keep]
+        self.ids = self.ids[keep]
+        self.hits = self.hits[keep]
+        self.born = self.born[keep]
+        self.last_update = self.last_update[keep]
+
+    # Process one scan of detections (angles in degrees, distances, times)
+    def process(self, angles, distances, times):
+        if not len(angles):
+            return
+        now = float(np.max(times))
+        self.predict(now)
+        rad = np.radians(angles)
+        z = np.column_stack((distances * np.cos(rad), distances * np.sin(rad)))
+        if len(self):
+            d2 = self._distances(z)
+            t, d = self._assign(d2)
+            if len(t):
+                self._update(t, z[d], now)
+            # Detections inside some track's gate are extra returns from
+            # that target, not new targets
+            spare = ~(d2 < GATE).any(axis=0)
+        else:
+            spare = np.ones(len(z), dtype=bool)
+        # Several returns off one new target in the same scan start one track
+        births = z[spare]
+        if len(births) > 1:
+            cells = np.floor(births / BIRTH_CELL).astype(np.int64)
+            _, first = np.unique(cells, axis=0, return_index=True)
+            births = births[np.sort(first)]
+        self._birth(births, now)
+
+    # Move the clock to `now` and delete tracks that have gone stale
+    def coast(self, now):
+        self.predict(now)
+        if not len(self):
+            return
+        age = self.time - self.last_update
+        stale = age > DELETE_AFTER
+        unconfirmed = ~self.confirmed & (self.time - self.born > TENTATIVE_TIMEOUT)
+        if (stale | unconfirmed).any():
+            self._keep(~(stale | unconfirmed))
+
+    # Confirmed tracks as (ids, angles in 0-360 degrees, distances, visible)
+    def tracks(self):
+        confirmed = self.confirmed
+        x = self.state[confirmed, 0]
+        y = self.state[confirmed, 1]
+        angles = np.degrees(np.arctan2(y, x)) % 360
+        distances = np.hypot(x, y)
+        visible = (self.time - self.last_update[confirmed]) <= VISIBLE_WINDOW
+        return self.ids[confirmed], angles, distances, visible
@@ -0,0 +1,159 @@
+import numpy as np
+
+# Integer type codes stored in the track table. The index into TARGET_TYPES
+# is the code, so codes can be turned back into the GUI's type strings.
+TYPE_UNKNOWN = 0
+TYPE_AIRCRAFT = 1
+TYPE_SHIP = 2
+TYPE_VEHICLE = 3
+TARGET_TYPES = ("unknown", "aircraft", "ship", "vehicle")
+TYPE_CODES = {name: code for code, name in enumerate(TARGET_TYPES)}
+
+
+# Struct-of-arrays track table. Every per-target attribute lives in its own
+# contiguous array so a whole tick (motion, bounce, disappear, reappear) is a
+# handful of NumPy operations instead of a Python loop over targets.
+class TrackStore:
+    def __init__(self, capacity=64):
+        capacity = max(int(capacity), 1)
+        self.count = 0
+        self._angle = np.zeros(capacity)
+        self._distance = np.zeros(capacity)
+        self._v_angle = np.zeros(capacity)
+        self._v_distance = np.zeros(capacity)
+        self._visible = np.ones(capacity, dtype=bool)
+        self._disappear_time = np.full(capacity, np.nan)
+        self._type_code = np.zeros(capacity, dtype=np.int8)
+        self._track_id = np.zeros(capacity, dtype=np.int64)
+        self.next_id = 1
+        # Names are only needed for labels, so they stay a plain list
+        self.names = []
+
+    # Active views into the backing arrays (no copies)
+    @property
+    def angle(self):
+        return self._angle[:self.count]
+
+    @property
+    def distance(self):
+        return self._distance[:self.count]
+
+    @property
+    def v_angle(self):
+        return self._v_angle[:self.count]
+
+    @property
+    def v_distance(self):
+        return self._v_distance[:self.count]
+
+    @property
+    def visible(self):
+        return self._visible[:self.count]
+
+    @property
+    def disappear_time(self):
+        return self._disappear_time[:self.count]
+
+    @property
+    def type_code(self):
+        return self._type_code[:self.count]
+
+    # Stable identity of each track; indices shift when tracks are removed
+    @property
+    def track_id(self):
+        return self._track_id[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    # Grow every backing array so at least `needed` tracks fit
+    def _reserve(self, needed):
+        capacity = len(self._angle)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr, fill in (("_angle", 0.0), ("_distance", 0.0), ("_v_angle", 0.0),
+                           ("_v_distance", 0.0), ("_visible", True),
+                           ("_disappear_time", np.nan), ("_type_code", 0), ("_track_id", 0)):
+            old = getattr(self, attr)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, attr, new)
+
+    # Append a batch of tracks; scalars are broadcast over the batch. New
+    # tracks get fresh IDs unless `ids` is given. Returns the index of the
+    # first new track.
+    def add_many(self, angles, distances, v_angles, v_distances, type_code, names, ids=None):
+        angles = np.asarray(angles, dtype=float)
+        n = len(angles)
+        start = self.count
+        self._reserve(start + n)
+        end = start + n
+        self._angle[start:end] = angles
+        self._distance[start:end] = distances
+        self._v_angle[start:end] = v_angles
+        self._v_distance[start:end] = v_distances
+        self._visible[start:end] = True
+        self._disappear_time[start:end] = np.nan
+        self._type_code[start:end] = type_code
+        if ids is None:
+            ids = np.arange(self.next_id, self.next_id + n)
+            self.next_id += n
+        self._track_id[start:end] = ids
+        self.names.extend(names)
+        self.count = end
+        return start
+
+    def add(self, angle, distance, v_angle, v_distance, type_code, name):
+        return self.add_many([angle], distance, v_angle, v_distance, type_code, [name])
+
+    # Drop every track from index `count` onwards
+    def truncate(self, count):
+        if count < self.count:
+            self.count = count
+            del self.names[count:]
+
+    def clear(self):
+        self.truncate(0)
+
+    # Advance every track by `dt` seconds of its velocity (degrees and
+    # distance units per second), sweeping the angle over 0-180 degrees and
+    # bouncing the distance off 0 and `radius`
+    def step(self, radius, dt=1.0):
+        angle = self.angle
+        distance = self.distance
+        v_distance = self.v_distance
+        angle += self.v_angle * dt
+        np.remainder(angle, 180, out=angle)
+        distance += v_distance * dt
+        bounced = (distance <= 0) | (distance >= radius)
+        v_distance[bounced] *= -1
+        np.clip(distance, 0, radius, out=distance)
+
+    # Hide each visible track with probability `rate`. Returns a boolean mask
+    # of the tracks that disappeared on this call.
+    def random_disappear(self, now, rate, rng):
+        gone = (rng.random(self.count) < rate) & self.visible
+        self.visible[gone] = False
+        self.disappear_time[gone] = now
+        return gone
+
+    # Bring back tracks that have been hidden for longer than `timeout`
+    # seconds. Returns a boolean mask of the tracks that reappeared.
+    def reappear(self, now, timeout):
+        with np.errstate(invalid="ignore"):
+            back = ~self.visible & ((now - self.disappear_time) > timeout)
+        self.visible[back] = True
+        self.disappear_time[back] = np.nan
+        return back
+
+    # Cartesian screen positions of all tracks
+    def positions(self, center_x, center_y):
+        rad = np.radians(self.angle)
+        x = center_x + self.distance * np.cos(rad)
+        y = center_y + self.distance * np.sin(rad)
+        return x, y
+
+    def type_name(self, i):
+        return TARGET_TYPES[self._type_code[i]]
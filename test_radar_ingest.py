@@ -0,0 +1,134 @@
+import os
+import numpy as np
+from radar_ingest import SampleRing, AsciiParser, AutoParser, SerialReader
+from radar_protocol import FrameDecoder, encode_frame, cobs_encode, cobs_decode
+
+
+def test_ring_wraps_around():
+    ring = SampleRing(8)
+    for start in range(0, 40, 5):
+        values = np.arange(start, start + 5, dtype=float)
+        assert ring.push(values, values * 2, values * 3) == 5
+        angles, distances, times = ring.drain()
+        assert angles.tolist() == values.tolist()
+        assert distances.tolist() == (values * 2).tolist()
+        assert times.tolist() == (values * 3).tolist()
+    assert ring.overruns == 0
+
+
+def test_ring_counts_overruns():
+    ring = SampleRing(4)
+    values = np.arange(6, dtype=float)
+    assert ring.push(values, values, values) == 4
+    assert ring.overruns == 2
+    assert ring.drain()[0].tolist() == [0, 1, 2, 3]
+    assert len(ring) == 0
+
+
+def test_ascii_lines_split_across_reads():
+    parser = AsciiParser()
+    angles, _, _ = parser.feed(b"10,100\n20,2")
+    assert angles.tolist() == [10]
+    angles, distances, _ = parser.feed(b"00\n30,300\n")
+    assert angles.tolist() == [20, 30]
+    assert distances.tolist() == [200, 300]
+    assert parser.errors == 0
+
+
+def test_ascii_bad_lines_are_counted():
+    parser = AsciiParser()
+    angles, distances, _ = parser.feed(b"1,2,3\n4\n5,6\nhello\n")
+    assert angles.tolist() == [5]
+    assert distances.tolist() == [6]
+    assert parser.errors == 3
+
+
+def test_cobs_round_trip():
+    data = bytes([0, 1, 0, 0, 255]) + bytes(range(1, 256)) * 2
+    encoded = cobs_encode(data)
+    assert 0 not in encoded
+    assert bytes(cobs_decode(encoded)) == data
+
+
+def test_frames_round_trip_and_reject_corruption():
+    frames = [encode_frame([10.5, 20.25], [100.0, 200.5], [1000, 2000], [k * 2, k * 2 + 1]) for k in range(3)]
+    decoder = FrameDecoder()
+    angles, distances, ticks = decoder.feed(b"".join(frames))
+    assert angles.tolist() == [10.5, 20.25] * 3
+    assert distances.tolist() == [100.0, 200.5] * 3
+    assert ticks.tolist() == [1000, 2000] * 3
+    assert decoder.errors == 0 and decoder.dropped == 0
+
+    corrupt = bytearray(frames[1])
+    corrupt[3] ^= 0x40
+    angles, _, _ = decoder.feed(frames[0] + bytes(corrupt) + frames[2])
+    assert len(angles) == 4
+    assert decoder.errors == 1
+
+
+def test_decoder_resyncs_without_terminator():
+    decoder = FrameDecoder()
+    for _ in range(100):
+        decoder.feed(b"no terminator here")
+    assert len(decoder.pending) < 300
+    assert decoder.errors > 0
+    angles, _, _ = decoder.feed(b"\x00" + encode_frame([1.0], [2.0], [3], [0]))
+    assert angles.tolist() == [1.0]
+
+
+def test_auto_parser_ignores_stray_zero():
+    parser = AutoParser()
+    parser.feed(b"1,2\n3\x004\n")
+    angles, _, _ = parser.feed(b"5,6\n")
+    assert not parser.is_binary
+    assert angles.tolist() == [5]
+
+
+def test_auto_parser_switches_on_first_frame():
+    stream = b"1,2\n" + b"".join(encode_frame([k], [50], [k * 100], [k]) for k in range(10))
+    parser = AutoParser()
+    angles = np.concatenate([parser.feed(stream[i:i + 7])[0] for i in range(0, len(stream), 7)])
+    assert parser.is_binary
+    assert angles.tolist() == [1] + list(range(10))
+    assert parser.errors == 0
+
+
+def test_reader_over_pty_ascii(open_pty, wait_for):
+    master, port = open_pty()
+    ring = SampleRing()
+    reader = SerialReader(port, ring)
+    reader.start()
+    try:
+        os.write(master, b"".join(b"%d,%d\n" % (i % 180, i) for i in range(500)))
+        assert wait_for(lambda: len(ring) >= 500)
+        angles, distances, times = ring.drain()
+        assert distances.tolist() == list(range(500))
+        assert reader.parser.errors == 0
+        assert reader.bytes_read > 0
+    finally:
+        reader.stop(1)
+
+
+def test_reader_over_pty_binary_uses_device_ticks(open_pty, wait_for):
+    master, port = open_pty()
+    ring = SampleRing()
+    reader = SerialReader(port, ring)
+    reader.start()
+    try:
+        # Ticks cross the 2^30 wrap halfway through
+        ticks = (np.arange(200) * 10000 + (1 << 30) - 1000000) % (1 << 30)
+        data = b"".join(encode_frame([45.0] * 4, [100.0] * 4, ticks[k:k + 4], range(k, k + 4))
+                        for k in range(0, 200, 4))
+        for k in range(0, len(data), 64):
+            os.write(master, data[k:k + 64])
+        assert wait_for(lambda: len(ring) >= 200)
+        _, _, times = ring.drain()
+        # Unwrapped device time plus an offset that only ever moves down to
+        # the lowest latency seen (the drift allowance is microseconds here)
+        offset = times - np.arange(200) * 0.01
+        assert np.all(np.diff(offset) < 1e-3)
+        assert offset.max() - offset.min() < 5
+        assert reader.parser.is_binary
+        assert reader.parser.errors == 0
+    finally:
+        reader.stop(1)
@@ -0,0 +1,13 @@
+import numpy as np
+from radar_ppi import PPIRaster
+
+
+def test_returns_outside_the_display_are_ignored():
+    raster = PPIRaster(100)
+    raster.add_returns(np.array([90.0, 45.0, 0.0, 10.0]), np.array([-300.0, -20.0, 150.0, np.nan]))
+    assert raster.echoes == 0
+    assert not raster.buffer.any()
+    raster.add_returns(np.array([0.0]), np.array([50.0]))
+    assert raster.echoes == 1
+    y, x = divmod(int(np.argmax(raster.buffer)), raster.size)
+    assert (x - raster.radius, y - raster.radius) == (50, 0)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from radar_replay import LogRecorder, LogReader, Replayer, RECORD_DTYPE, KIND_SAMPLE, _header
+
+
+def test_late_samples_are_logged_in_time_order(tmp_path):
+    path = str(tmp_path / "radar.log")
+    recorder = LogRecorder(path)
+    recorder.record_samples(np.array([1.0, 2.0]), np.zeros(2), np.full(2, 50.0))
+    # Samples held back by the sensor hub arrive after a later record
+    recorder.record_samples(np.array([5.0]), np.zeros(1), np.full(1, 50.0))
+    recorder.record_samples(np.array([4.5, 6.0, 5.5]), np.zeros(3), np.full(3, 50.0))
+    recorder.close()
+    # Appending to the log carries on from its last record
+    recorder = LogRecorder(path)
+    recorder.record_samples(np.array([3.0]), np.zeros(1), np.full(1, 50.0))
+    recorder.close()
+
+    reader = LogReader(path)
+    assert reader.times.tolist() == [1, 2, 5, 5, 6, 6, 6]
+    replayer = Replayer(reader)
+    assert len(replayer.advance(3.5)) == 2
+    assert len(replayer.advance(1.0)) == 2
+    reader.close()
+
+
+def test_reader_rejects_unordered_log(tmp_path):
+    path = tmp_path / "radar.log"
+    records = np.zeros(3, dtype=RECORD_DTYPE)
+    records["time"] = [1.0, 3.0, 2.0]
+    records["kind"] = KIND_SAMPLE
+    path.write_bytes(_header() + records.tobytes())
+    with pytest.raises(ValueError):
+        LogReader(str(path))
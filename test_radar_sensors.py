@@ -0,0 +1,115 @@
+import os
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from radar_sensors import Sensor, SensorHub, SensorMount, parse_port_spec
+from radar_protocol import encode_frame
+
+
+# A sensor whose ring is filled by hand instead of a reader thread
+def ring_sensor(name, mount=None):
+    return Sensor(SimpleNamespace(name=name, is_open=True), mount)
+
+
+def push(sensor, times):
+    times = np.asarray(times, dtype=float)
+    sensor.ring.push(np.zeros(len(times)), np.full(len(times), 100.0), times)
+
+
+def test_parse_port_spec():
+    device, mount = parse_port_spec("/dev/ttyACM1@120,-5,180")
+    assert device == "/dev/ttyACM1"
+    assert (mount.x, mount.y, mount.bearing) == (120, -5, 180)
+    assert parse_port_spec("COM3")[1].is_origin
+    with pytest.raises(ValueError):
+        parse_port_spec("COM3@1,2")
+
+
+def test_mount_moves_samples_into_radar_frame():
+    mount = SensorMount(100, 0, 180)
+    angles, distances = mount.to_radar(np.array([0.0, 90.0]), np.array([50.0, 100.0]))
+    assert np.allclose(angles, [0, 315])
+    assert np.allclose(distances, [50, np.hypot(100, 100)])
+
+
+def test_drain_holds_samples_newer_than_the_watermark():
+    a = ring_sensor("A")
+    b = ring_sensor("B")
+    hub = SensorHub([a, b], max_hold=0.5)
+
+    push(a, [1, 2, 3])
+    push(b, [1.5])
+    assert hub.drain(0.0)[2].tolist() == [1, 1.5]  # A's 2 and 3 could still be overtaken by B
+
+    push(b, [2.5, 4])
+    assert hub.drain(0.1)[2].tolist() == [2, 2.5, 3]
+    push(a, [5])
+    assert hub.drain(0.2)[2].tolist() == [4]
+
+    # B stays quiet; A's 5 is held until B has been silent for max_hold
+    assert len(hub.drain(0.5)[2]) == 0
+    assert hub.drain(0.75)[2].tolist() == [5]
+
+
+def test_drain_merges_unsorted_batches():
+    a = ring_sensor("A")
+    b = ring_sensor("B")
+    hub = SensorHub([a, b])
+    push(a, [3, 1, 2])
+    push(b, [2.5, 0.5])
+    assert hub.drain(0.0)[2].tolist() == [0.5, 1, 2, 2.5]
+    assert hub.drain(1.0)[2].tolist() == [3]
+
+
+def test_dropped_counts_sequence_gaps_on_every_sensor():
+    sensors = [ring_sensor("A"), ring_sensor("B")]
+    hub = SensorHub(sensors)
+    sensors[0].reader.parser.feed(encode_frame([0.0], [50.0], [0], [0]) + encode_frame([0.0], [50.0], [1], [5]))
+    sensors[1].reader.parser.feed(encode_frame([0.0] * 2, [50.0] * 2, [0, 1], [7, 9]))
+    assert hub.dropped == 5
+
+
+def test_drain_merges_pty_sensors_in_time_order(open_pty, wait_for):
+    ports = [open_pty() for _ in range(3)]
+    mounts = [SensorMount(), SensorMount(), SensorMount(100, 0, 90)]
+    hub = SensorHub([Sensor(port, mount) for (_, port), mount in zip(ports, mounts)])
+    hub.start()
+    frames = 30
+    samples = 3 * frames * 4
+    drained = []
+
+    def write_frame(k):
+        for n, (master, _) in enumerate(ports):
+            # Each board has its own tick base; ticks are 5 ms apart
+            ticks = n * 123456789 + (np.arange(4) + 4 * k) * 5000
+            os.write(master, encode_frame([0.0] * 4, [50.0] * 4, ticks, range(4 * k, 4 * k + 4)))
+
+    def drain():
+        batch = hub.drain(time.time())
+        if len(batch[0]):
+            drained.append(batch)
+        return sum(len(b[0]) for b in drained) >= samples
+
+    try:
+        # Every board has spoken before the first drain, so nothing released
+        # can be overtaken later
+        write_frame(0)
+        assert wait_for(lambda: all(len(s.ring) for s in hub.sensors))
+        for k in range(1, frames):
+            write_frame(k)
+            drain()
+            time.sleep(0.02)
+        # The boards go quiet; the held-back tail comes out after MAX_HOLD
+        assert wait_for(drain)
+        assert hub.errors == 0
+        assert hub.dropped == 0
+        angles, distances, times = (np.concatenate(column) for column in zip(*drained))
+        assert len(times) == samples
+        assert np.all(np.diff(times) >= 0)
+        mounted = np.isclose(distances, np.hypot(100, 50))
+        assert mounted.sum() == samples // 3
+        assert np.allclose(angles[mounted], np.degrees(np.arctan2(50, 100)))
+        assert np.allclose(distances[~mounted], 50)
+    finally:
+        hub.stop(1)
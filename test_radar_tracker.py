@@ -0,0 +1,75 @@
+import numpy as np
+from radar_tracker import Tracker, CONFIRM_HITS
+
+
+# A tracker holding confirmed tracks at `positions`, with no position
+# uncertainty of its own so that squared distances are plain squared
+# Euclidean distances (measurement noise 1)
+def tracker_at(positions, now=0.0):
+    tracker = Tracker(measurement_noise=1.0)
+    n = len(positions)
+    tracker.state = np.zeros((n, 4))
+    tracker.state[:, :2] = positions
+    tracker.cov = np.zeros((n, 4, 4))
+    tracker.ids = np.arange(1, n + 1)
+    tracker.hits = np.full(n, CONFIRM_HITS)
+    tracker.born = np.full(n, now)
+    tracker.last_update = np.full(n, now)
+    tracker.time = now
+    tracker.next_id = n + 1
+    return tracker
+
+
+def detect(tracker, points, now):
+    points = np.asarray(points, dtype=float)
+    angles = np.degrees(np.arctan2(points[:, 1], points[:, 0]))
+    distances = np.hypot(points[:, 0], points[:, 1])
+    tracker.process(angles, distances, np.full(len(points), now))
+
+
+def test_assign_covers_every_track_it_can():
+    t, d = Tracker()._assign(np.array([[1.0, 2.0], [2.0, np.inf]]))
+    assert sorted(zip(t.tolist(), d.tolist())) == [(0, 1), (1, 0)]
+
+
+def test_assign_minimises_total_distance():
+    d2 = np.array([[1.0, 2.0, 50.0],
+                   [2.0, 4.0, 50.0],
+                   [50.0, 50.0, 3.0]])
+    t, d = Tracker()._assign(d2)
+    assert sorted(zip(t.tolist(), d.tolist())) == [(0, 1), (1, 0), (2, 2)]
+
+
+def test_assign_leaves_ungated_pairs_alone():
+    t, d = Tracker()._assign(np.array([[50.0, 1.0], [50.0, 2.0]]))
+    assert list(zip(t.tolist(), d.tolist())) == [(0, 1)]
+
+
+def test_crossing_targets_both_keep_their_tracks():
+    # D0 is closest to T0 but also in T1's gate; D1 is only in T0's gate.
+    # Giving D0 to T0 would leave T1 without an update and D1 thrown away.
+    # (Same scan time as the tracker, so nothing is predicted and the
+    # squared distances are exactly 1, 2, 2 and 13.)
+    tracker = tracker_at([[100.0, 0.0], [102.0, -1.0]], now=1.0)
+    tracker.last_update[:] = 0.0
+    detect(tracker, [[101.0, 0.0], [99.0, 1.0]], 1.0)
+    assert len(tracker) == 2
+    assert tracker.last_update.tolist() == [1.0, 1.0]
+    assert tracker.births == 0
+
+
+def test_unmatched_detection_far_away_starts_a_track():
+    tracker = tracker_at([[100.0, 0.0]])
+    detect(tracker, [[100.5, 0.0], [0.0, 200.0]], 1.0)
+    assert len(tracker) == 2
+    assert tracker.births == 1
+    assert tracker.ids.tolist() == [1, 2]
+
+
+def test_stale_tracks_are_deleted():
+    tracker = tracker_at([[100.0, 0.0]])
+    tracker.coast(10.0)
+    assert len(tracker) == 1
+    tracker.coast(25.0)
+    assert len(tracker) == 0
+    assert tracker.deaths == 1